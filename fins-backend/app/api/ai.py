@@ -5,20 +5,23 @@ from app.models.ai_models import (
 )
 from app.services.ai_service import AIService
 from app.auth.jwt import get_current_active_user
-from app.database import get_db
-from supabase import Client
+from app.container import get_ai_service
+from app.memory_guard import admit_ai_work
+from app.responses import FastJSONResponse
+from app.resilience import DatabaseUnavailableError
 from typing import Dict, Any
+from app.tracing import TracedRoute
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/ai", tags=["inteligência artificial"])
+router = APIRouter(prefix="/ai", tags=["inteligência artificial"], route_class=TracedRoute)
 
-@router.get("/predict/balance", response_model=BalancePrediction)
+@router.get("/predict/balance", response_model=BalancePrediction, dependencies=[Depends(admit_ai_work)])
 async def predict_balance(
     months_ahead: int = 3,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Previsão do saldo futuro
@@ -32,26 +35,27 @@ async def predict_balance(
     - Acurácia do modelo
     """
     try:
-        ai_service = AIService(db)
         prediction = await ai_service.predict_balance(current_user["user_id"], months_ahead)
-        return prediction
+        return FastJSONResponse(prediction)
         
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        logger.error(f"Erro na previsão de saldo: {e}")
+        logger.error("Erro na previsão de saldo: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
 
-@router.get("/predict/savings", response_model=SavingsPrediction)
+@router.get("/predict/savings", response_model=SavingsPrediction, dependencies=[Depends(admit_ai_work)])
 async def predict_savings(
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Previsão da capacidade de poupança
@@ -63,26 +67,27 @@ async def predict_savings(
     - Recomendações para aumentar poupança
     """
     try:
-        ai_service = AIService(db)
         prediction = await ai_service.predict_savings(current_user["user_id"])
-        return prediction
+        return FastJSONResponse(prediction)
         
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        logger.error(f"Erro na previsão de poupança: {e}")
+        logger.error("Erro na previsão de poupança: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
 
-@router.get("/analyze/risk", response_model=RiskAnalysis)
+@router.get("/analyze/risk", response_model=RiskAnalysis, dependencies=[Depends(admit_ai_work)])
 async def analyze_risk(
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Análise de risco de inadimplência
@@ -95,26 +100,27 @@ async def analyze_risk(
     - Recomendações para reduzir risco
     """
     try:
-        ai_service = AIService(db)
         analysis = await ai_service.analyze_risk(current_user["user_id"])
-        return analysis
+        return FastJSONResponse(analysis)
         
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        logger.error(f"Erro na análise de risco: {e}")
+        logger.error("Erro na análise de risco: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
 
-@router.get("/analyze/expenses", response_model=ExpenseAnalysis)
+@router.get("/analyze/expenses", response_model=ExpenseAnalysis, dependencies=[Depends(admit_ai_work)])
 async def analyze_expenses(
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Análise detalhada de despesas
@@ -127,26 +133,27 @@ async def analyze_expenses(
     - Recomendações de orçamento
     """
     try:
-        ai_service = AIService(db)
         analysis = await ai_service.analyze_expenses(current_user["user_id"])
-        return analysis
+        return FastJSONResponse(analysis)
         
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        logger.error(f"Erro na análise de despesas: {e}")
+        logger.error("Erro na análise de despesas: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
 
-@router.get("/insights", response_model=FinancialInsights)
+@router.get("/insights", response_model=FinancialInsights, dependencies=[Depends(admit_ai_work)])
 async def get_financial_insights(
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Insights financeiros completos
@@ -161,17 +168,18 @@ async def get_financial_insights(
     - Itens de ação recomendados
     """
     try:
-        ai_service = AIService(db)
         insights = await ai_service.generate_financial_insights(current_user["user_id"])
-        return insights
+        return FastJSONResponse(insights)
         
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        logger.error(f"Erro ao gerar insights financeiros: {e}")
+        logger.error("Erro ao gerar insights financeiros: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -180,7 +188,7 @@ async def get_financial_insights(
 @router.get("/health", response_model=Dict[str, Any])
 async def ai_health_check(
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Verificação de saúde dos modelos de IA
@@ -191,8 +199,6 @@ async def ai_health_check(
     - Capacidades de análise
     """
     try:
-        ai_service = AIService(db)
-        
         # Verifica se o usuário tem dados suficientes
         df = await ai_service.get_user_financial_data(current_user["user_id"])
         
@@ -221,7 +227,7 @@ async def ai_health_check(
         return health_status
         
     except Exception as e:
-        logger.error(f"Erro no health check de IA: {e}")
+        logger.error("Erro no health check de IA: %s", e)
         return {
             "status": "unhealthy",
             "error": str(e),
@@ -3,17 +3,18 @@ from fastapi.security import OAuth2PasswordRequestForm
 from app.models.user import User, UserCreate, UserUpdate
 from app.services.user_service import UserService
 from app.auth.jwt import jwt_manager, get_current_active_user
-from app.database import get_db
-from supabase import Client
+from app.container import get_user_service
+from app.resilience import DatabaseUnavailableError
 from typing import List
+from app.tracing import TracedRoute
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/auth", tags=["autenticação"])
+router = APIRouter(prefix="/auth", tags=["autenticação"], route_class=TracedRoute)
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Client = Depends(get_db)):
+async def register(user_data: UserCreate, user_service: UserService = Depends(get_user_service)):
     """
     Registra um novo usuário
     
@@ -23,20 +24,19 @@ async def register(user_data: UserCreate, db: Client = Depends(get_db)):
     - **phone**: Telefone (opcional)
     """
     try:
-        user_service = UserService(db)
         user = await user_service.create_user(user_data)
         return user
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro no registro: {e}")
+        logger.error("Erro no registro: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
 
 @router.post("/login")
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Client = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), user_service: UserService = Depends(get_user_service)):
     """
     Autentica usuário e retorna token JWT
     
@@ -44,7 +44,6 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Client = D
     - **password**: Senha do usuário
     """
     try:
-        user_service = UserService(db)
         user = await user_service.authenticate_user(form_data.username, form_data.password)
         
         if not user:
@@ -69,22 +68,21 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Client = D
             }
         }
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro no login: {e}")
+        logger.error("Erro no login: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
 
 @router.get("/me", response_model=User)
-async def get_current_user_info(current_user: dict = Depends(get_current_active_user), db: Client = Depends(get_db)):
+async def get_current_user_info(current_user: dict = Depends(get_current_active_user), user_service: UserService = Depends(get_user_service)):
     """
     Retorna informações do usuário atual
     """
     try:
-        user_service = UserService(db)
         user = await user_service.get_user_by_id(current_user["user_id"])
         
         if not user:
@@ -95,10 +93,10 @@ async def get_current_user_info(current_user: dict = Depends(get_current_active_
         
         return user
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro ao buscar usuário: {e}")
+        logger.error("Erro ao buscar usuário: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -108,7 +106,7 @@ async def get_current_user_info(current_user: dict = Depends(get_current_active_
 async def update_current_user(
     user_data: UserUpdate, 
     current_user: dict = Depends(get_current_active_user), 
-    db: Client = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """
     Atualiza informações do usuário atual
@@ -117,7 +115,6 @@ async def update_current_user(
     - **phone**: Novo telefone (opcional)
     """
     try:
-        user_service = UserService(db)
         updated_user = await user_service.update_user(current_user["user_id"], user_data)
         
         if not updated_user:
@@ -128,10 +125,10 @@ async def update_current_user(
         
         return updated_user
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro ao atualizar usuário: {e}")
+        logger.error("Erro ao atualizar usuário: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -140,13 +137,12 @@ async def update_current_user(
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_current_user(
     current_user: dict = Depends(get_current_active_user), 
-    db: Client = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """
     Deleta o usuário atual (soft delete)
     """
     try:
-        user_service = UserService(db)
         success = await user_service.delete_user(current_user["user_id"])
         
         if not success:
@@ -157,10 +153,10 @@ async def delete_current_user(
         
         return None
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro ao deletar usuário: {e}")
+        logger.error("Erro ao deletar usuário: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -171,18 +167,19 @@ async def get_all_users(
     skip: int = 0, 
     limit: int = 100, 
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """
     Lista todos os usuários (apenas para administradores)
     """
     try:
-        user_service = UserService(db)
         users = await user_service.get_all_users(skip, limit)
         return users
         
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        logger.error(f"Erro ao listar usuários: {e}")
+        logger.error("Erro ao listar usuários: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -0,0 +1,130 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.services.user_service import UserService
+from app.services.financial_service import FinancialService
+from app.auth.jwt import get_current_active_user
+from app.container import get_user_service, get_financial_service
+from app.config import settings
+from app.responses import FastJSONResponse
+from app.resilience import DatabaseUnavailableError
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.tracing import TracedRoute
+import contextvars
+import threading
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"], route_class=TracedRoute)
+
+DASHBOARD_SECTIONS = ("user", "profile", "summary", "expenses", "receipts")
+
+
+class SectionExecutor:
+    """
+    Executa os métodos dos serviços em um pool de threads dedicado e limitado.
+
+    Os métodos são assíncronos, mas o cliente do banco é síncrono: no event
+    loop as consultas rodariam uma após a outra. Cada seção roda em uma
+    thread do pool, no event loop próprio da thread (criado uma vez e
+    reaproveitado), e as consultas ocorrem em paralelo sem ocupar o pool
+    padrão usado por run_in_executor (autenticação do WebSocket,
+    aquecimentos). O mapa de identidade da requisição é compartilhado entre
+    as threads, então linhas lidas por uma seção são reaproveitadas pelas
+    seguintes.
+    """
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard")
+        self._local = threading.local()
+
+    def _run(self, func: Callable[..., Awaitable[Any]], args: tuple) -> Any:
+        loop = getattr(self._local, "loop", None)
+        if loop is None:
+            loop = self._local.loop = asyncio.new_event_loop()
+        return loop.run_until_complete(func(*args))
+
+    async def run(self, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        # Copia o contexto (usuário da requisição, span atual) para a thread, como asyncio.to_thread
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, context.run, self._run, func, args)
+
+
+# Instância global do executor das seções
+section_executor = SectionExecutor(settings.dashboard_max_workers)
+
+
+def _parse_sections(sections: Optional[str]) -> tuple:
+    if not sections:
+        return DASHBOARD_SECTIONS
+    requested = tuple(dict.fromkeys(s.strip() for s in sections.split(",") if s.strip()))
+    unknown = [s for s in requested if s not in DASHBOARD_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Seções desconhecidas: {', '.join(unknown)}. Disponíveis: {', '.join(DASHBOARD_SECTIONS)}"
+        )
+    return requested
+
+
+@router.get("", response_model=Dict[str, Any])
+async def get_dashboard(
+    sections: Optional[str] = Query(None, description="Seções separadas por vírgula (padrão: todas)"),
+    limit: int = Query(100, ge=1, le=1000, description="Máximo de despesas e recibos"),
+    current_user: dict = Depends(get_current_active_user),
+    user_service: UserService = Depends(get_user_service),
+    financial_service: FinancialService = Depends(get_financial_service)
+):
+    """
+    Dados do dashboard em uma única requisição
+
+    - **sections**: user, profile, summary, expenses e/ou receipts
+    - **limit**: Máximo de despesas e recibos mais recentes
+
+    Substitui as chamadas a /auth/me, /financial/profile, /financial/summary,
+    /financial/expenses e /financial/receipts: o token é verificado uma vez,
+    o perfil é buscado uma única vez e as demais leituras rodam em paralelo.
+    """
+    requested = _parse_sections(sections)
+    user_id = current_user["user_id"]
+
+    async def profile_and_summary() -> Dict[str, Any]:
+        # O resumo vem depois do perfil para reaproveitá-lo (mapa de identidade ou cache)
+        result = {}
+        if "profile" in requested:
+            result["profile"] = await section_executor.run(financial_service.get_financial_profile, user_id)
+        if "summary" in requested:
+            result["summary"] = await section_executor.run(financial_service.get_financial_summary, user_id)
+        return result
+
+    async def section(name: str, func: Callable[..., Awaitable[Any]], *args: Any) -> Dict[str, Any]:
+        return {name: await section_executor.run(func, *args)}
+
+    reads = []
+    if "profile" in requested or "summary" in requested:
+        reads.append(profile_and_summary())
+    if "user" in requested:
+        reads.append(section("user", user_service.get_user_by_id, user_id))
+    if "expenses" in requested:
+        reads.append(section("expenses", financial_service.get_user_expenses, user_id, 0, limit))
+    if "receipts" in requested:
+        reads.append(section("receipts", financial_service.get_user_receipts, user_id, 0, limit))
+
+    try:
+        payload: Dict[str, Any] = {}
+        for result in await asyncio.gather(*reads):
+            payload.update(result)
+
+        # Mantém a ordem pedida pelo cliente
+        return FastJSONResponse({name: payload.get(name) for name in requested})
+
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error("Erro ao montar dashboard: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
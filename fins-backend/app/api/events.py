@@ -0,0 +1,103 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from app.auth.jwt import jwt_manager, active_user_cache
+from app.config import settings
+from app.container import container
+from app.events import event_bus
+from app.metrics import WEBSOCKET_CONNECTIONS
+from typing import Optional
+import asyncio
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/events", tags=["eventos"])
+
+
+async def _authenticate(websocket: WebSocket) -> Optional[str]:
+    """
+    Retorna o ID do usuário ativo dono do token, ou None.
+
+    Navegadores não enviam cabeçalhos personalizados no handshake do
+    WebSocket, então o token também é aceito no parâmetro `token`.
+    """
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    payload = jwt_manager.verify_token(token) if token else None
+    user_id = payload.get("sub") if payload else None
+    if user_id is None:
+        return None
+
+    is_active = active_user_cache.get(user_id)
+    if is_active is None:
+        loop = asyncio.get_running_loop()
+        query = container.db.table("users").select("is_active").eq("id", user_id)
+        result = await loop.run_in_executor(None, query.execute)
+        is_active = bool(result.data) and bool(result.data[0].get("is_active", True))
+        active_user_cache.set(user_id, is_active)
+    return user_id if is_active else None
+
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket):
+    """
+    Canal de eventos em tempo real do usuário autenticado
+
+    Envia, como mensagens JSON, os eventos publicados pelo FinancialService:
+    `balance.changed`, `transaction.created/updated/deleted`,
+    `profile.updated` e `budget.warning/exceeded`. Um `ping` é enviado
+    periodicamente para manter a conexão aberta em proxies. Se eventos forem
+    descartados (cliente lento), chega um `resync` e o cliente deve chamar
+    /financial/sync.
+    """
+    try:
+        user_id = await _authenticate(websocket)
+    except Exception as e:
+        logger.error("Erro ao autenticar conexão de eventos: %s", e)
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = event_bus.subscribe(user_id)
+    WEBSOCKET_CONNECTIONS.inc()
+
+    async def receive_until_disconnect() -> None:
+        # Mensagens do cliente são ignoradas; a leitura só detecta a desconexão
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    async def send_events() -> None:
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=settings.events_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                event = {"type": "ping"}
+            if event is None:
+                # Worker em encerramento: o cliente reconecta em outro worker
+                await websocket.close(code=status.WS_1001_GOING_AWAY)
+                return
+            if subscription.lost:
+                subscription.lost = False
+                await websocket.send_text('{"type":"resync"}')
+            await websocket.send_text(orjson.dumps(event).decode("utf-8"))
+
+    tasks = [asyncio.create_task(receive_until_disconnect()), asyncio.create_task(send_events())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                logger.warning("Conexão de eventos encerrada com erro: %s", exc)
+    finally:
+        event_bus.unsubscribe(subscription)
+        WEBSOCKET_CONNECTIONS.dec()
@@ -1,25 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from app.models.user import (
     FinancialProfile, FinancialProfileCreate, FinancialProfileUpdate,
     Expense, ExpenseCreate, ExpenseUpdate, Receipt, ReceiptCreate, ReceiptUpdate
 )
-from app.services.financial_service import FinancialService
+from app.services.financial_service import FinancialService, InvalidSyncCursorError
+from app.services.export_service import ExportService, ExportFormat, MEDIA_TYPES
 from app.auth.jwt import get_current_active_user
-from app.database import get_db
-from supabase import Client
-from typing import List, Dict, Any
+from app.container import get_financial_service, get_export_service
+from app.responses import FastJSONResponse
+from app.conditional import make_etag, etag_headers, is_not_modified, not_modified
+from app.resilience import DatabaseUnavailableError
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from app.tracing import TracedRoute
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/financial", tags=["financeiro"])
+router = APIRouter(prefix="/financial", tags=["financeiro"], route_class=TracedRoute)
+
+async def _current_etag(financial_service: FinancialService, resource: str, user_id: str, tables, *extra) -> Optional[str]:
+    """ETag atual do recurso; sem ETag (resposta completa) se a versão não puder ser lida"""
+    try:
+        version = await financial_service.get_data_version(user_id)
+    except Exception as e:
+        logger.warning("Erro ao obter versão dos dados: %s", e)
+        return None
+    return make_etag(resource, user_id, version, tables, *extra)
 
 # Financial Profile Endpoints
 @router.post("/profile", response_model=FinancialProfile, status_code=status.HTTP_201_CREATED)
 async def create_financial_profile(
     profile_data: FinancialProfileCreate,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    financial_service: FinancialService = Depends(get_financial_service)
 ):
     """
     Cria um novo perfil financeiro para o usuário
@@ -30,7 +45,6 @@ async def create_financial_profile(
     """
     try:
         # Verifica se o usuário já tem um perfil
-        financial_service = FinancialService(db)
         existing_profile = await financial_service.get_financial_profile(current_user["user_id"])
         
         if existing_profile:
@@ -44,10 +58,10 @@ async def create_financial_profile(
         profile = await financial_service.create_financial_profile(profile_data)
         return profile
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro ao criar perfil financeiro: {e}")
+        logger.error("Erro ao criar perfil financeiro: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -55,15 +69,23 @@ async def create_financial_profile(
 
 @router.get("/profile", response_model=FinancialProfile)
 async def get_financial_profile(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    financial_service: FinancialService = Depends(get_financial_service)
 ):
     """
     Retorna o perfil financeiro do usuário atual
+    
+    Suporta If-None-Match: responde 304 se o perfil não mudou.
     """
     try:
-        financial_service = FinancialService(db)
-        profile = await financial_service.get_financial_profile(current_user["user_id"])
+        user_id = current_user["user_id"]
+        etag = await _current_etag(financial_service, "profile", user_id, ("financial_profiles",))
+        if etag and is_not_modified(request, etag):
+            return not_modified(etag)
+        
+        profile = await financial_service.get_financial_profile(user_id)
         
         if not profile:
             raise HTTPException(
@@ -71,12 +93,14 @@ async def get_financial_profile(
                 detail="Perfil financeiro não encontrado"
             )
         
+        if etag:
+            response.headers.update(etag_headers(etag))
         return profile
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro ao buscar perfil financeiro: {e}")
+        logger.error("Erro ao buscar perfil financeiro: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -86,7 +110,7 @@ async def get_financial_profile(
 async def update_financial_profile(
     profile_data: FinancialProfileUpdate,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    financial_service: FinancialService = Depends(get_financial_service)
 ):
     """
     Atualiza o perfil financeiro do usuário
@@ -96,7 +120,6 @@ async def update_financial_profile(
     - **monthly_expenses**: Novas despesas mensais (opcional)
     """
     try:
-        financial_service = FinancialService(db)
         profile = await financial_service.update_financial_profile(current_user["user_id"], profile_data)
         
         if not profile:
@@ -107,10 +130,10 @@ async def update_financial_profile(
         
         return profile
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro ao atualizar perfil financeiro: {e}")
+        logger.error("Erro ao atualizar perfil financeiro: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -121,7 +144,7 @@ async def update_financial_profile(
 async def create_expense(
     expense_data: ExpenseCreate,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    financial_service: FinancialService = Depends(get_financial_service)
 ):
     """
     Cria uma nova despesa
@@ -132,15 +155,14 @@ async def create_expense(
     - **date**: Data da despesa
     """
     try:
-        financial_service = FinancialService(db)
         expense_data.user_id = current_user["user_id"]
         expense = await financial_service.create_expense(expense_data)
         return expense
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro ao criar despesa: {e}")
+        logger.error("Erro ao criar despesa: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -148,24 +170,33 @@ async def create_expense(
 
 @router.get("/expenses", response_model=List[Expense])
 async def get_expenses(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    financial_service: FinancialService = Depends(get_financial_service)
 ):
     """
     Lista todas as despesas do usuário
     
     - **skip**: Número de registros para pular
     - **limit**: Número máximo de registros
+    
+    Suporta If-None-Match: responde 304 se as despesas não mudaram.
     """
     try:
-        financial_service = FinancialService(db)
-        expenses = await financial_service.get_user_expenses(current_user["user_id"], skip, limit)
-        return expenses
+        user_id = current_user["user_id"]
+        etag = await _current_etag(financial_service, "expenses", user_id, ("expenses",), skip, limit)
+        if etag and is_not_modified(request, etag):
+            return not_modified(etag)
+        
+        expenses = await financial_service.get_user_expenses(user_id, skip, limit)
+        return FastJSONResponse(expenses, headers=etag_headers(etag) if etag else None)
         
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        logger.error(f"Erro ao listar despesas: {e}")
+        logger.error("Erro ao listar despesas: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -176,7 +207,7 @@ async def update_expense(
     expense_id: str,
     expense_data: ExpenseUpdate,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    financial_service: FinancialService = Depends(get_financial_service)
 ):
     """
     Atualiza uma despesa específica
@@ -188,7 +219,6 @@ async def update_expense(
     - **date**: Nova data (opcional)
     """
     try:
-        financial_service = FinancialService(db)
         expense = await financial_service.update_expense(expense_id, current_user["user_id"], expense_data)
         
         if not expense:
@@ -199,10 +229,10 @@ async def update_expense(
         
         return expense
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro ao atualizar despesa: {e}")
+        logger.error("Erro ao atualizar despesa: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -212,7 +242,7 @@ async def update_expense(
 async def delete_expense(
     expense_id: str,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    financial_service: FinancialService = Depends(get_financial_service)
 ):
     """
     Deleta uma despesa específica
@@ -220,7 +250,6 @@ async def delete_expense(
     - **expense_id**: ID da despesa
     """
     try:
-        financial_service = FinancialService(db)
         success = await financial_service.delete_expense(expense_id, current_user["user_id"])
         
         if not success:
@@ -231,10 +260,10 @@ async def delete_expense(
         
         return None
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro ao deletar despesa: {e}")
+        logger.error("Erro ao deletar despesa: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -245,7 +274,7 @@ async def delete_expense(
 async def create_receipt(
     receipt_data: ReceiptCreate,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    financial_service: FinancialService = Depends(get_financial_service)
 ):
     """
     Cria um novo recibo
@@ -256,15 +285,14 @@ async def create_receipt(
     - **category**: Categoria (opcional)
     """
     try:
-        financial_service = FinancialService(db)
         receipt_data.user_id = current_user["user_id"]
         receipt = await financial_service.create_receipt(receipt_data)
         return receipt
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
         raise
     except Exception as e:
-        logger.error(f"Erro ao criar recibo: {e}")
+        logger.error("Erro ao criar recibo: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -272,24 +300,33 @@ async def create_receipt(
 
 @router.get("/receipts", response_model=List[Receipt])
 async def get_receipts(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    financial_service: FinancialService = Depends(get_financial_service)
 ):
     """
     Lista todos os recibos do usuário
     
     - **skip**: Número de registros para pular
     - **limit**: Número máximo de registros
+    
+    Suporta If-None-Match: responde 304 se os recibos não mudaram.
     """
     try:
-        financial_service = FinancialService(db)
-        receipts = await financial_service.get_user_receipts(current_user["user_id"], skip, limit)
-        return receipts
+        user_id = current_user["user_id"]
+        etag = await _current_etag(financial_service, "receipts", user_id, ("receipts",), skip, limit)
+        if etag and is_not_modified(request, etag):
+            return not_modified(etag)
+        
+        receipts = await financial_service.get_user_receipts(user_id, skip, limit)
+        return FastJSONResponse(receipts, headers=etag_headers(etag) if etag else None)
         
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
-        logger.error(f"Erro ao listar recibos: {e}")
+        logger.error("Erro ao listar recibos: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -298,8 +335,10 @@ async def get_receipts(
 # Summary Endpoint
 @router.get("/summary", response_model=Dict[str, Any])
 async def get_financial_summary(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_active_user),
-    db: Client = Depends(get_db)
+    financial_service: FinancialService = Depends(get_financial_service)
 ):
     """
     Retorna um resumo financeiro do usuário
@@ -311,10 +350,20 @@ async def get_financial_summary(
     - Despesas dos últimos 30 dias
     - Recebimentos dos últimos 30 dias
     - Fluxo líquido dos últimos 30 dias
+    
+    Suporta If-None-Match. A janela de 30 dias avança com o tempo, então a
+    ETag também muda a cada hora, mesmo sem alterações nos dados.
     """
     try:
-        financial_service = FinancialService(db)
-        summary = await financial_service.get_financial_summary(current_user["user_id"])
+        user_id = current_user["user_id"]
+        window = datetime.utcnow().strftime("%Y-%m-%dT%H")
+        etag = await _current_etag(
+            financial_service, "summary", user_id, ("financial_profiles", "expenses", "receipts"), window
+        )
+        if etag and is_not_modified(request, etag):
+            return not_modified(etag)
+        
+        summary = await financial_service.get_financial_summary(user_id)
         
         if not summary:
             raise HTTPException(
@@ -322,13 +371,80 @@ async def get_financial_summary(
                 detail="Perfil financeiro não encontrado"
             )
         
+        if etag:
+            response.headers.update(etag_headers(etag))
         return summary
         
-    except HTTPException:
+    except (HTTPException, DatabaseUnavailableError):
+        raise
+    except Exception as e:
+        logger.error("Erro ao gerar resumo financeiro: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        ) 
+
+# Sync Endpoint
+@router.get("/sync", response_model=Dict[str, Any])
+async def sync_financial_data(
+    since: Optional[str] = Query(None, description="Cursor retornado pela sincronização anterior"),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="Máximo de linhas por tabela"),
+    current_user: dict = Depends(get_current_active_user),
+    financial_service: FinancialService = Depends(get_financial_service)
+):
+    """
+    Sincronização incremental de perfil, despesas e recibos
+    
+    - **since**: Cursor da última sincronização (omita na primeira)
+    - **limit**: Máximo de linhas por tabela nesta página
+    
+    Retorna as linhas criadas ou alteradas, os IDs excluídos (`deleted`) e um
+    novo `cursor`. Com `has_more`, chame novamente com o novo cursor; com
+    `reset`, substitua a cópia local pelos dados retornados. Linhas podem se
+    repetir entre chamadas, então aplique-as por ID.
+    """
+    try:
+        changes = await financial_service.get_changes(current_user["user_id"], since, limit)
+        return FastJSONResponse(changes)
+        
+    except InvalidSyncCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except DatabaseUnavailableError:
         raise
     except Exception as e:
-        logger.error(f"Erro ao gerar resumo financeiro: {e}")
+        logger.error("Erro ao sincronizar dados financeiros: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
-        ) 
\ No newline at end of file
+        )
+
+# Export Endpoint
+@router.get("/export")
+async def export_financial_data(
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    current_user: dict = Depends(get_current_active_user),
+    export_service: ExportService = Depends(get_export_service)
+):
+    """
+    Exporta todo o histórico financeiro do usuário
+    
+    - **format**: csv, ndjson ou parquet
+    
+    Os dados (perfil, despesas e recibos) são lidos do banco e enviados em
+    blocos, mantendo o uso de memória constante independente do volume.
+    """
+    if not export_service.is_format_available(export_format):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato {export_format.value} não disponível neste servidor"
+        )
+    
+    filename = f"fins-export-{datetime.utcnow().strftime('%Y%m%d')}.{export_format.value}"
+    return StreamingResponse(
+        export_service.stream(current_user["user_id"], export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,20 +1,38 @@
 from datetime import datetime, timedelta
 from typing import Optional, Union
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from supabase import Client
 from app.config import settings
+from app.auth.passwords import pwd_context
+from app.cache import TTLCache, build_cache_backend
+from app.database import get_db, request_user
+from app.resilience import DatabaseUnavailableError
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
-# Configuração de criptografia
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Configuração do bearer token
 security = HTTPBearer()
 
+# Claims de tokens já verificados, válidos no máximo até o exp do token
+token_cache = TTLCache(
+    "verified_tokens",
+    max_size=settings.token_cache_max_size,
+    ttl=settings.access_token_expire_minutes * 60,
+)
+
+# Status ativo dos usuários; invalidado por UserService.update_user/delete_user
+active_user_cache = TTLCache(
+    "active_users",
+    max_size=settings.token_cache_max_size,
+    ttl=settings.user_status_cache_ttl_seconds,
+    backend=build_cache_backend("active_users"),
+    stale_ttl=settings.db_stale_cache_seconds,
+)
+
 class JWTManager:
     def __init__(self):
         self.secret_key = settings.secret_key
@@ -22,11 +40,11 @@ class JWTManager:
         self.access_token_expire_minutes = settings.access_token_expire_minutes
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verifica se a senha está correta"""
+        """Verifica se a senha está correta (bloqueante; em handlers use password_hasher)"""
         return pwd_context.verify(plain_password, hashed_password)
     
     def get_password_hash(self, password: str) -> str:
-        """Gera hash da senha"""
+        """Gera hash da senha (bloqueante; em handlers use password_hasher)"""
         return pwd_context.hash(password)
     
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -43,12 +61,21 @@ class JWTManager:
     
     def verify_token(self, token: str) -> Optional[dict]:
         """Verifica e decodifica o token JWT"""
+        payload = token_cache.get(token)
+        if payload is not None:
+            return payload
+        
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return payload
         except JWTError as e:
-            logger.error(f"Erro ao verificar token: {e}")
+            logger.error("Erro ao verificar token: %s", e)
             return None
+        
+        # A assinatura não muda, então as claims podem ser reaproveitadas até o exp
+        exp = payload.get("exp")
+        ttl = exp - time.time() if exp else token_cache.ttl
+        token_cache.set(token, payload, ttl=min(ttl, token_cache.ttl))
+        return payload
 
 # Instância global do JWT Manager
 jwt_manager = JWTManager()
@@ -73,9 +100,40 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Identifica o usuário para a consistência leitura-após-escrita das consultas
+    request_user.set(user_id)
     return {"user_id": user_id, "email": payload.get("email")}
 
-async def get_current_active_user(current_user: dict = Depends(get_current_user)) -> dict:
+async def get_current_active_user(
+    current_user: dict = Depends(get_current_user),
+    db: Client = Depends(get_db)
+) -> dict:
     """Dependency para obter usuário ativo"""
-    # Aqui você pode adicionar lógica adicional para verificar se o usuário está ativo
+    user_id = current_user["user_id"]
+    is_active = active_user_cache.get(user_id)
+    
+    if is_active is None:
+        try:
+            result = db.table("users").select("is_active").eq("id", user_id).execute()
+            is_active = bool(result.data) and bool(result.data[0].get("is_active", True))
+            active_user_cache.set(user_id, is_active)
+        except DatabaseUnavailableError:
+            # Com o banco fora, vale o último status conhecido do usuário
+            is_active = active_user_cache.get_stale(user_id)
+            if is_active is None:
+                raise
+        except Exception as e:
+            logger.error("Erro ao verificar status do usuário: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Serviço temporariamente indisponível"
+            )
+    
+    if not is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuário inativo",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     return current_user 
\ No newline at end of file
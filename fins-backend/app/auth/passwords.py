@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+from app.config import settings
+import asyncio
+
+# Configuração de criptografia. min/max_rounds iguais ao custo configurado
+# fazem o passlib sinalizar hashes com outro custo para serem regravados
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
+
+
+class PasswordHasher:
+    """
+    Executa o bcrypt em um pool de threads dedicado e limitado.
+
+    Cada hash/verificação custa centenas de milissegundos de CPU; rodando
+    no event loop, um pico de logins congelaria todos os outros endpoints.
+    O bcrypt libera o GIL, então o pool também usa múltiplos núcleos.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> None:
+        """Cria o pool (no startup da aplicação e de novo após um shutdown)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, func, *args):
+        if self._executor is None:
+            # Uso fora do lifespan (scripts e testes sem o container)
+            self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def hash(self, password: str) -> str:
+        """Gera o hash da senha com o custo configurado"""
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verifica a senha contra o hash armazenado"""
+        return await self._run(pwd_context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verifica a senha e, se o custo do hash divergir do configurado, retorna um novo hash"""
+        return await self._run(pwd_context.verify_and_update, password, hashed_password)
+
+    def shutdown(self, wait: bool = True) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# Instância global do hasher de senhas
+password_hasher = PasswordHasher(settings.password_hash_workers)
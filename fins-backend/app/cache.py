@@ -0,0 +1,205 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app.config import settings
+from app.metrics import CACHE_REQUESTS
+import threading
+import logging
+import json
+import time
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CacheBackend:
+    """Interface de backend compartilhado entre workers"""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend compartilhado em Redis (valores serializados em JSON)"""
+
+    def __init__(self, url: str, prefix: str = "fins:cache:"):
+        import redis  # Dependência opcional, só necessária em deploys multi-worker
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.client.set(self.prefix + key, json.dumps(value, default=str), px=int(ttl * 1000))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+
+class TTLCache:
+    """
+    Cache LRU em memória com expiração por entrada e contadores de acerto/erro.
+
+    Com `stale_ttl`, entradas expiradas são mantidas por mais esse tempo e
+    podem ser lidas por get_stale() quando o banco está indisponível. Com
+    backend compartilhado, essa cópia local só é usada por get_stale().
+    """
+
+    def __init__(self, name: str, max_size: int = 1024, ttl: float = 60.0, backend: Optional[CacheBackend] = None, stale_ttl: float = 0.0):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hit_counter = CACHE_REQUESTS.labels(name, "hit")
+        self._miss_counter = CACHE_REQUESTS.labels(name, "miss")
+        self._stale_counter = CACHE_REQUESTS.labels(name, "stale")
+
+    @property
+    def is_shared(self) -> bool:
+        """Indica se o cache é consistente entre workers"""
+        return self.backend is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Busca um valor no cache (backend compartilhado, se configurado)"""
+        if self.backend is not None:
+            # Com backend compartilhado não há cópia local, evitando dados
+            # desatualizados quando outro worker altera a entrada
+            try:
+                value = self.backend.get(key)
+            except Exception as e:
+                logger.warning("Erro ao consultar cache compartilhado '%s': %s", self.name, e)
+                value = None
+            with self._lock:
+                if value is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            if value is None:
+                self._miss_counter.inc()
+                return default
+            self._hit_counter.inc()
+            return value
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    self._hit_counter.inc()
+                    return value
+                if expires_at + self.stale_ttl <= now:
+                    del self._data[key]
+            self.misses += 1
+        self._miss_counter.inc()
+        return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Armazena um valor no cache"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value, ttl)
+            except Exception as e:
+                logger.warning("Erro ao gravar cache compartilhado '%s': %s", self.name, e)
+            if self.stale_ttl <= 0:
+                return
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_stale(self, key: str, default: Any = None) -> Any:
+        """Busca um valor mesmo expirado, dentro de stale_ttl (último recurso com o banco indisponível)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[1] + self.stale_ttl <= now:
+                return default
+        self._stale_counter.inc()
+        return entry[0]
+
+    def delete(self, key: str) -> None:
+        """Invalida uma entrada no cache"""
+        with self._lock:
+            self._data.pop(key, None)
+        if self.backend is not None:
+            try:
+                self.backend.delete(key)
+            except Exception as e:
+                logger.warning("Erro ao invalidar cache compartilhado '%s': %s", self.name, e)
+
+    def clear(self) -> None:
+        """Limpa o cache local"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores do cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "shared": self.is_shared,
+            }
+
+
+# Prefixos em uso: caches que compartilham um prefixo sobrescrevem as chaves um do outro
+_backend_prefixes: set = set()
+
+
+def build_cache_backend(namespace: str) -> Optional[CacheBackend]:
+    """
+    Cria o backend compartilhado configurado (ou None para cache apenas local).
+
+    Cada cache passa o próprio nome em `namespace`, que entra no prefixo das
+    chaves no Redis: caches diferentes usam as mesmas chaves (o user_id).
+    """
+    prefix = f"fins:cache:{namespace}:"
+    if prefix in _backend_prefixes:
+        raise ValueError(f"Prefixo de cache '{prefix}' já usado por outro cache")
+    _backend_prefixes.add(prefix)
+    if settings.cache_backend == "redis" and settings.redis_url:
+        try:
+            return RedisCacheBackend(settings.redis_url, prefix=prefix)
+        except Exception as e:
+            logger.error("Erro ao inicializar cache Redis, usando apenas memória local: %s", e)
+    return None
+
+
+# Cache de perfis financeiros compartilhado entre requisições
+profile_cache = TTLCache(
+    "financial_profiles",
+    max_size=settings.profile_cache_max_size,
+    ttl=settings.profile_cache_ttl_seconds,
+    backend=build_cache_backend("financial_profiles"),
+    stale_ttl=settings.db_stale_cache_seconds,
+)
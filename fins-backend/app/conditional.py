@@ -0,0 +1,55 @@
+from typing import Any, Dict, Iterable, Mapping
+from fastapi import Request, Response
+import hashlib
+
+# Tabelas versionadas por usuário: max(updated_at) e contagem de linhas
+VERSIONED_TABLES = ("financial_profiles", "expenses", "receipts")
+
+
+def make_etag(resource: str, user_id: str, version: Mapping[str, Dict[str, Any]],
+              tables: Iterable[str], *extra: Any) -> str:
+    """
+    ETag fraca de um recurso do usuário.
+
+    Derivada da versão das tabelas das quais o recurso depende (maior
+    updated_at e número de linhas; a contagem cobre exclusões, que não
+    alteram o maior updated_at) e de parâmetros extras, como a paginação.
+    """
+    parts = [resource, user_id]
+    for table in tables:
+        table_version = version.get(table) or {}
+        parts.append(f"{table}:{table_version.get('updated_at')}:{table_version.get('count', 0)}")
+    parts.extend(str(value) for value in extra)
+    digest = hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """Cabeçalhos das respostas condicionais (cache privado, sempre revalidado)"""
+    return {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Compara o If-None-Match com a ETag (comparação fraca, RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """Resposta 304 sem corpo"""
+    return Response(status_code=304, headers=etag_headers(etag))
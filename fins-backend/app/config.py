@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 from dotenv import load_dotenv
 
@@ -24,13 +24,145 @@ class Settings(BaseSettings):
     secret_key: str = "your-secret-key-change-this"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+
+    # Password Hashing Configuration
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+
+    # Auth Cache Configuration
+    token_cache_max_size: int = 10000
+    user_status_cache_ttl_seconds: float = 30.0
     
     # Database Configuration
     database_url: str = ""
+    database_backend: str = "supabase"  # "supabase" ou "memory" (banco em memória, para testes e benchmarks)
+    memory_db_latency_ms: float = 0.0  # Latência simulada por consulta no banco em memória
+    memory_db_jitter_ms: float = 0.0
+
+    # Database Resilience Configuration
+    db_timeout_seconds: float = 10.0  # Timeout de cada requisição HTTP ao PostgREST
+    db_connect_timeout_seconds: float = 3.0
+    db_retry_attempts: int = 3  # Tentativas totais das leituras (escritas nunca são repetidas)
+    db_retry_base_backoff_seconds: float = 0.05
+    db_retry_max_backoff_seconds: float = 0.5
+    db_retry_deadline_seconds: float = 2.0  # Nenhuma nova tentativa começa depois deste tempo
+    db_circuit_failure_threshold: int = 5  # Falhas passageiras consecutivas que abrem o circuito
+    db_circuit_recovery_seconds: float = 30.0  # Tempo aberto antes de liberar uma consulta de teste
+    db_circuit_half_open_max_calls: int = 1
+    db_stale_cache_seconds: float = 3600.0  # Por quanto tempo uma entrada expirada ainda pode ser servida com o banco indisponível
+
+    # Read Replica Configuration
+    supabase_read_url: str = ""  # Endpoint da réplica de leitura (vazio: tudo no primário)
+    supabase_read_key: str = ""  # Padrão: SUPABASE_KEY
+    read_your_writes_seconds: float = 5.0  # Após uma escrita, as leituras do usuário ficam no primário
+    db_replica_exclude_tables: List[str] = ["users"]  # Autenticação e status do usuário sempre no primário
+    db_replica_functions: List[str] = ["user_data_version"]  # Funções somente leitura executadas na réplica
+
+    # Database Pool Configuration
+    db_pool_max_connections: int = 20  # Conexões HTTP simultâneas ao primário, por worker
+    db_pool_max_keepalive: int = 10
+    db_replica_pool_max_connections: int = 40  # Leituras analíticas (IA, resumo) concentram-se na réplica
+    db_replica_pool_max_keepalive: int = 20
     
     # ML Model Configuration
     model_path: str = "./models/"
-    
+
+    # Cache Configuration
+    cache_backend: str = "memory"  # "memory" (por worker) ou "redis" (compartilhado)
+    redis_url: str = ""
+    profile_cache_ttl_seconds: float = 60.0
+    profile_cache_max_size: int = 10000
+
+    # Sync Configuration
+    sync_page_size: int = 500  # Máximo de linhas por tabela em cada chamada de /financial/sync
+    sync_cursor_overlap_seconds: float = 5.0  # Recuo do cursor para não perder commits atrasados
+    sync_tombstone_retention_days: int = 90  # Cursores mais antigos exigem sincronização completa
+
+    # Events Configuration
+    events_backend: str = "memory"  # "memory" (por worker) ou "redis" (Pub/Sub entre workers)
+    events_queue_size: int = 100  # Eventos pendentes por conexão antes de pedir ressincronização
+    events_heartbeat_seconds: float = 25.0
+    budget_warning_ratio: float = 0.8  # Fração do orçamento da categoria que dispara budget.warning
+
+    # Export Configuration
+    export_chunk_size: int = 1000
+
+    # Dashboard Configuration
+    dashboard_max_workers: int = 4  # Threads dedicadas às seções do dashboard por worker
+
+    # Rate Limit Configuration
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # "memory" (por worker) ou "redis" (compartilhado)
+    rate_limit_capacity: float = 120.0
+    rate_limit_refill_per_second: float = 2.0
+    # Custo de cada requisição por prefixo de rota, relativo a API_V1_STR (padrão: 1)
+    rate_limit_route_costs: Dict[str, float] = {
+        "/ai": 20.0,
+        "/auth/login": 10.0,
+        "/auth/register": 10.0,
+        "/dashboard": 5.0,  # Substitui cinco chamadas separadas
+        "/financial/export": 20.0,
+    }
+    # Proxies (IPs ou redes CIDR, "*" para qualquer um) cujo X-Forwarded-For
+    # identifica o cliente anônimo; sem isso todos compartilham o IP do proxy
+    rate_limit_trusted_proxies: List[str] = []
+    rate_limit_exempt_paths: List[str] = ["/", "/health", "/ready", "/info", "/metrics", "/docs", "/redoc", "/openapi.json"]
+
+    # Compression Configuration
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024  # Corpos menores são enviados sem compressão
+    compression_encodings: List[str] = ["br", "zstd", "gzip"]  # Ordem de preferência do servidor
+    compression_content_types: List[str] = ["application/json", "application/x-ndjson", "text/"]
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4  # Níveis altos do brotli são caros demais para conteúdo dinâmico
+    compression_zstd_level: int = 3
+    compression_offload_bytes: int = 262144  # A partir deste tamanho, comprime em uma thread
+
+    # Lifecycle Configuration
+    warmup_ai_models: bool = True  # Ajusta um modelo Prophet mínimo antes de o worker ficar pronto
+    warmup_retry_seconds: float = 5.0
+    shutdown_drain_seconds: float = 20.0
+
+    # Memory Guard Configuration
+    memory_guard_enabled: bool = True
+    # Limites por worker; 0 deriva do limite de memória do container (cgroup)
+    # dividido por WEB_CONCURRENCY: 75% da fatia (suave) e 90% (rígido)
+    memory_soft_limit_mb: int = 0  # Acima dele, novas análises de IA são recusadas (503)
+    memory_hard_limit_mb: int = 0  # Acima dele, o worker é drenado e reciclado
+    web_concurrency: int = 1  # Workers por container (mesma variável lida pelo gunicorn)
+    memory_check_interval_seconds: float = 5.0
+    ai_max_computations_per_worker: int = 500  # Recicla o worker após N análises de IA (0 desativa)
+    memory_recycle_drain_seconds: float = 30.0  # Espera das análises em andamento antes de reciclar
+
+    # Logging Configuration
+    log_level: str = "INFO"
+    log_format: str = "json"  # "json" (uma linha por registro) ou "text"
+    log_queue_enabled: bool = True  # Escrita em uma thread de segundo plano
+    log_queue_size: int = 10000  # Com a fila cheia, registros são descartados em vez de bloquear
+    log_rate_limit_per_second: float = 50.0  # Por logger
+    log_rate_limit_burst: float = 200.0
+    log_sample_window_seconds: float = 10.0
+    log_sample_first: int = 5  # Repetições de uma mensagem sempre registradas em cada janela
+    log_sample_every: int = 100  # Depois delas, registra uma a cada N
+
+    # Tracing Configuration
+    tracing_enabled: bool = False
+    tracing_exporter: str = "jsonl"  # "console" (stdout) ou "jsonl" (arquivo local)
+    tracing_file_path: str = "./traces.jsonl"
+    tracing_sample_ratio: float = 1.0
+
+    # Profiler Configuration
+    profiler_enabled: bool = False
+    profiler_admin_token: str = ""  # Valor esperado no cabeçalho X-Profile-Token
+    profiler_always: bool = False  # Perfila todas as requisições (apenas desenvolvimento)
+    profiler_output_dir: str = "./profiles"
+    profiler_interval_seconds: float = 0.001
+
+    # Event Loop Monitor Configuration
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_seconds: float = 0.05
+    loop_monitor_block_threshold_seconds: float = 0.1
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,183 @@
+from typing import Dict, Optional
+from fastapi import Depends
+from app.config import settings
+from app.database import Database, db as database
+from app.identity_map import IdentityMap, get_identity_map
+from app.auth.passwords import PasswordHasher, password_hasher
+from app.services.user_service import UserService
+from app.services.financial_service import FinancialService
+from app.services.ai_service import AIService
+from app.services.export_service import ExportService
+import functools
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Serviços de longa duração de um worker.
+
+    Criados uma única vez no lifespan da aplicação (em vez de a cada
+    requisição), junto com a conexão ao banco e o pool do bcrypt. O worker só
+    fica pronto (/ready) depois dos aquecimentos; no encerramento ele deixa
+    de aceitar tráfego, aguarda os hashes de senha em andamento e libera os
+    recursos. O pool é recriado a cada start(), então o container pode
+    passar por mais de um lifespan no mesmo processo (testes, reload).
+    """
+
+    def __init__(self, database: Database, hasher: PasswordHasher):
+        self.database = database
+        self.password_hasher = hasher
+        self.db = None
+        self.user_service: Optional[UserService] = None
+        self.financial_service: Optional[FinancialService] = None
+        self.ai_service: Optional[AIService] = None
+        self.export_service: Optional[ExportService] = None
+        self.ready = False
+        self.draining = False
+        self.warmup_status: Dict[str, str] = {}
+        self._retry_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Conecta ao banco, cria os serviços e executa os aquecimentos"""
+        started = time.perf_counter()
+        self.ready = False
+        self.draining = False
+        self.warmup_status = {}
+        self.password_hasher.start()
+        loop = asyncio.get_running_loop()
+        # create_client é síncrono; roda fora do event loop
+        self.db = await loop.run_in_executor(None, self.database.connect)
+        self.user_service = UserService(self.db)
+        self.financial_service = FinancialService(self.db)
+        self.ai_service = AIService(self.db)
+        self.export_service = ExportService(self.db)
+
+        if await self.warm_up():
+            self.ready = True
+            logger.info(f"Worker pronto em {time.perf_counter() - started:.2f}s")
+        else:
+            # Continua tentando em segundo plano; /ready responde 503 até lá
+            self._retry_task = asyncio.create_task(self._retry_warm_up())
+
+    async def warm_up(self) -> bool:
+        """
+        Executa os aquecimentos; retorna True se os obrigatórios passaram.
+
+        Nas novas tentativas só rodam os que ainda não passaram: com apenas o
+        banco fora do ar, o ajuste do Prophet e o hash do bcrypt não se repetem.
+        """
+        steps = [
+            ("database", self._warm_database, True),
+            ("password_hasher", self._warm_password_hasher, False),
+        ]
+        if settings.warmup_ai_models:
+            steps.append(("prophet", self._warm_prophet, False))
+
+        ok = True
+        for name, step, required in steps:
+            if self.warmup_status.get(name) == "ok":
+                continue
+            started = time.perf_counter()
+            try:
+                await step()
+                self.warmup_status[name] = "ok"
+                logger.info(f"Aquecimento '{name}' concluído em {(time.perf_counter() - started) * 1000:.0f} ms")
+            except Exception as e:
+                self.warmup_status[name] = f"erro: {e}"
+                logger.error(f"Falha no aquecimento '{name}': {e}")
+                ok = ok and not required
+        return ok
+
+    async def _retry_warm_up(self) -> None:
+        while True:
+            await asyncio.sleep(settings.warmup_retry_seconds)
+            if await self.warm_up():
+                self.ready = True
+                logger.info("Worker pronto após nova tentativa de aquecimento")
+                return
+
+    async def _warm_database(self) -> None:
+        loop = asyncio.get_running_loop()
+        query = self.db.table("users").select("id").limit(1)
+        await loop.run_in_executor(None, query.execute)
+        if self.db.has_replica:
+            # users fica sempre no primário; esta leitura abre a conexão com a
+            # réplica. Sem ela o worker ainda atende, com as leituras no primário
+            query = self.db.table("financial_profiles").select("id").limit(1)
+            try:
+                await loop.run_in_executor(None, query.execute)
+            except Exception as e:
+                logger.warning(f"Réplica de leitura indisponível no aquecimento: {e}")
+
+    async def _warm_password_hasher(self) -> None:
+        # Cria as threads do pool e carrega o backend do bcrypt
+        await asyncio.gather(*(
+            self.password_hasher.hash("warm-up") for _ in range(self.password_hasher.max_workers)
+        ))
+
+    async def _warm_prophet(self) -> None:
+        # O primeiro ajuste carrega o modelo Stan compilado, o que leva segundos
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _fit_tiny_prophet)
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Deixa de aceitar tráfego, drena o pool do bcrypt e libera os recursos"""
+        timeout = settings.shutdown_drain_seconds if timeout is None else timeout
+        self.ready = False
+        self.draining = True
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            self._retry_task = None
+
+        loop = asyncio.get_running_loop()
+        drain = loop.run_in_executor(None, functools.partial(self.password_hasher.shutdown, wait=True))
+        try:
+            # Logins e cadastros em andamento terminam antes de o worker sair
+            await asyncio.wait_for(asyncio.shield(drain), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Hashes de senha ainda em andamento após {timeout:.0f}s; encerrando mesmo assim")
+        self.database.close()
+        logger.info("Recursos do worker liberados")
+
+
+def _fit_tiny_prophet() -> None:
+    import pandas as pd
+    from prophet import Prophet
+
+    df = pd.DataFrame({
+        "ds": pd.date_range("2024-01-01", periods=30, freq="D"),
+        "y": [float(i % 7) for i in range(30)],
+    })
+    Prophet(yearly_seasonality=False, weekly_seasonality=False, daily_seasonality=False).fit(df)
+
+
+# Instância global do container (inicializada no lifespan da aplicação)
+container = ServiceContainer(database, password_hasher)
+
+
+async def get_container() -> ServiceContainer:
+    return container
+
+
+async def get_user_service() -> UserService:
+    """Dependency que injeta o UserService do container"""
+    return container.user_service
+
+
+async def get_financial_service(identity_map: IdentityMap = Depends(get_identity_map)) -> FinancialService:
+    """Dependency que injeta o FinancialService ligado ao mapa de identidade da requisição"""
+    return container.financial_service.scoped(identity_map)
+
+
+async def get_ai_service(identity_map: IdentityMap = Depends(get_identity_map)) -> AIService:
+    """Dependency que injeta o AIService ligado ao mapa de identidade da requisição"""
+    return container.ai_service.scoped(identity_map)
+
+
+async def get_export_service() -> ExportService:
+    """Dependency que injeta o ExportService do container"""
+    return container.export_service
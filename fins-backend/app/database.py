@@ -1,35 +1,292 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
 from app.config import settings
+from app.cache import TTLCache, build_cache_backend
+from app.memory_database import MemoryClient
+from app.metrics import DB_READ_ROUTING
+from app.resilience import CircuitBreaker, get_breaker
+import functools
+import httpx
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+_WRITE_OPERATIONS = {"insert", "update", "upsert", "delete"}
+
+# Usuário autenticado da requisição atual (definido por get_current_user)
+request_user: ContextVar[Optional[str]] = ContextVar("db_request_user", default=None)
+
+# Usuários que escreveram recentemente: suas leituras vão ao primário até a
+# réplica alcançar a escrita. Com CACHE_BACKEND=redis vale entre workers
+write_pins = TTLCache(
+    "read_your_writes",
+    max_size=settings.token_cache_max_size,
+    ttl=settings.read_your_writes_seconds,
+    backend=build_cache_backend("read_your_writes"),
+)
+
+
+@dataclass
+class QueryContext:
+    """Identifica a consulta em execução para os interceptadores"""
+    table: str
+    operation: str
+    builder: Any = None
+    client: str = "primary"  # "primary" ou "replica"
+
+    def describe(self) -> str:
+        """Filtros e modificadores da consulta (query string do PostgREST)"""
+        params = getattr(self.builder, "params", None)
+        return str(params) if params is not None else ""
+
+
+# Interceptadores recebem o contexto e a função que executa a consulta (ou o
+# próximo interceptador) e devem retornar o resultado de chamá-la
+QueryInterceptor = Callable[[QueryContext, Callable[[], Any]], Any]
+
+_interceptors: List[QueryInterceptor] = []
+
+
+def add_query_interceptor(interceptor: QueryInterceptor) -> None:
+    """Registra um interceptador em volta de todo execute() (o primeiro registrado é o mais externo)"""
+    if interceptor not in _interceptors:
+        _interceptors.append(interceptor)
+
+
+def _run_query(context: QueryContext, execute: Callable[[], Any]) -> Any:
+    call = execute
+    for interceptor in reversed(_interceptors):
+        call = functools.partial(interceptor, context, call)
+    return call()
+
+
+def read_target(table: str) -> str:
+    """
+    Escolhe o cliente de uma leitura quando há réplica configurada.
+
+    Vão ao primário as tabelas de DB_REPLICA_EXCLUDE_TABLES, as leituras do
+    usuário que escreveu há menos de READ_YOUR_WRITES_SECONDS e todas as
+    leituras enquanto o circuito da réplica estiver aberto.
+    """
+    user_id = request_user.get()
+    if table in settings.db_replica_exclude_tables:
+        client, reason = "primary", "excluded"
+    elif user_id is not None and write_pins.get(user_id):
+        client, reason = "primary", "pinned"
+    elif get_breaker("replica").state == CircuitBreaker.OPEN:
+        client, reason = "primary", "replica_unavailable"
+    else:
+        client, reason = "replica", "replica"
+    DB_READ_ROUTING.labels(client, reason).inc()
+    return client
+
+
+def pin_request_user() -> None:
+    """Direciona ao primário as próximas leituras do usuário da requisição"""
+    user_id = request_user.get()
+    if user_id is not None:
+        write_pins.set(user_id, True)
+
+
+def after_key(query: Any, column: str, value: Any, row_id: Any) -> Any:
+    """
+    Filtro keyset: linhas estritamente depois de (column, id) na ordem (column, id).
+
+    Paginar assim usa o índice (user_id, column) sem reler as linhas das
+    páginas anteriores, como faria um OFFSET.
+    """
+    return query.or_(f'{column}.gt."{value}",and({column}.eq."{value}",id.gt."{row_id}")')
+
+
+class QueryBuilderProxy:
+    """Envolve o query builder do PostgREST para observar cada execute()"""
+
+    _OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+
+    def __init__(
+        self,
+        builder: Any,
+        table: str,
+        operation: str = "select",
+        client: str = "primary",
+        replica: Optional[Callable[[str], Any]] = None,
+        routed: bool = False,
+    ):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+        self._client = client
+        # Só o builder da tabela recebe a réplica: é no select que o cliente é escolhido
+        self._replica = replica
+        self._routed = routed or replica is not None
+
+    def __getattr__(self, name: str) -> Any:
+        builder, client = self._builder, self._client
+        if name == "select" and self._replica is not None and read_target(self._table) == "replica":
+            builder, client = self._replica(self._table), "replica"
+        attr = getattr(builder, name)
+        operation = name if name in self._OPERATIONS else self._operation
+
+        # Propriedades como not_ retornam o próprio builder
+        if hasattr(attr, "execute"):
+            return QueryBuilderProxy(attr, self._table, operation, client, routed=self._routed)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def wrapper(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return QueryBuilderProxy(result, self._table, operation, client, routed=self._routed)
+            return result
+
+        return wrapper
+
+    def execute(self) -> Any:
+        if self._routed and self._operation in _WRITE_OPERATIONS:
+            # Antes de executar: mesmo uma escrita que falhou por timeout pode ter sido gravada
+            pin_request_user()
+        context = QueryContext(self._table, self._operation, self._builder, self._client)
+        return _run_query(context, self._builder.execute)
+
+
+class InstrumentedClient:
+    """
+    Cliente Supabase cujas consultas passam pelos interceptadores registrados.
+
+    Com réplica de leitura, os selects e as funções de DB_REPLICA_FUNCTIONS
+    vão ao cliente escolhido por read_target(); escritas vão sempre ao
+    primário.
+    """
+
+    def __init__(self, client: Client, replica: Optional[Client] = None):
+        self._client = client
+        self._replica_client = replica
+
+    @property
+    def has_replica(self) -> bool:
+        return self._replica_client is not None
+
+    def table(self, table_name: str) -> QueryBuilderProxy:
+        replica = self._replica_table if self._replica_client is not None else None
+        return QueryBuilderProxy(self._client.table(table_name), table_name, replica=replica)
+
+    def from_(self, table_name: str) -> QueryBuilderProxy:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: dict = None) -> QueryBuilderProxy:
+        table = f"rpc:{fn}"
+        if (
+            self._replica_client is not None
+            and fn in settings.db_replica_functions
+            and read_target(table) == "replica"
+        ):
+            return QueryBuilderProxy(self._replica_client.rpc(fn, params or {}), table, "rpc", "replica")
+        return QueryBuilderProxy(self._client.rpc(fn, params or {}), table, "rpc")
+
+    def _replica_table(self, table_name: str) -> Any:
+        return self._replica_client.table(table_name)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def _create_supabase_client(url: str, key: str, max_connections: int, max_keepalive: int) -> Client:
+    """Cria um cliente Supabase com timeout e pool de conexões próprios"""
+    # Sem timeout, uma consulta presa ocupa o worker indefinidamente
+    timeout = httpx.Timeout(settings.db_timeout_seconds, connect=settings.db_connect_timeout_seconds)
+    client = create_client(url, key, options=ClientOptions(postgrest_client_timeout=timeout))
+
+    # O supabase-py não expõe os limites do httpx: a sessão do PostgREST é
+    # recriada com o pool configurado antes da primeira consulta
+    postgrest = client.postgrest
+    session = postgrest.session
+    postgrest.session = type(session)(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+    )
+    session.close()
+    return client
+
+
 class Database:
+    """
+    Conexão com o banco, criada sob demanda.
+
+    Nada é conectado na importação do módulo: o container de serviços chama
+    connect() no startup da aplicação e scripts avulsos conectam no primeiro
+    get_client().
+    """
+
     def __init__(self):
         self.supabase: Client = None
-        self._connect()
-    
+        self.read_supabase: Optional[Client] = None
+        self.client: InstrumentedClient = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.client is not None
+
+    def connect(self) -> InstrumentedClient:
+        """Conecta (uma única vez) e retorna o cliente instrumentado"""
+        with self._lock:
+            if self.client is None:
+                self._connect()
+        return self.client
+
+    def close(self) -> None:
+        """Descarta o cliente; a próxima chamada a get_client() reconecta"""
+        with self._lock:
+            self.supabase = None
+            self.read_supabase = None
+            self.client = None
+
     def _connect(self):
-        """Estabelece conexão com o Supabase"""
+        """Estabelece conexão com o Supabase (ou cria o banco em memória)"""
         try:
-            self.supabase = create_client(
+            if settings.database_backend == "memory":
+                self.supabase = MemoryClient(settings.memory_db_latency_ms, settings.memory_db_jitter_ms)
+                self.client = InstrumentedClient(self.supabase)
+                logger.warning("Usando banco de dados em memória; os dados serão perdidos ao encerrar")
+                return
+            self.supabase = _create_supabase_client(
                 settings.supabase_url,
-                settings.supabase_key
+                settings.supabase_key,
+                settings.db_pool_max_connections,
+                settings.db_pool_max_keepalive
             )
-            logger.info("Conexão com Supabase estabelecida com sucesso")
+            if settings.supabase_read_url:
+                self.read_supabase = _create_supabase_client(
+                    settings.supabase_read_url,
+                    settings.supabase_read_key or settings.supabase_key,
+                    settings.db_replica_pool_max_connections,
+                    settings.db_replica_pool_max_keepalive
+                )
+            self.client = InstrumentedClient(self.supabase, self.read_supabase)
+            if self.read_supabase is not None:
+                logger.info("Conexão com Supabase estabelecida com sucesso (leituras na réplica)")
+            else:
+                logger.info("Conexão com Supabase estabelecida com sucesso")
         except Exception as e:
             logger.error(f"Erro ao conectar com Supabase: {e}")
             raise
-    
+
     def get_client(self) -> Client:
         """Retorna o cliente Supabase"""
-        if not self.supabase:
-            self._connect()
-        return self.supabase
+        if self.client is None:
+            return self.connect()
+        return self.client
 
 # Instância global do banco de dados
 db = Database()
 
 def get_db() -> Client:
     """Dependency para injetar o cliente do banco de dados"""
-    return db.get_client() 
\ No newline at end of file
+    return db.get_client()
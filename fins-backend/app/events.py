@@ -0,0 +1,199 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Set
+from app.config import settings
+from app.metrics import EVENTS_PUBLISHED
+import asyncio
+import threading
+import logging
+import json
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, Dict[str, Any]], None]
+
+
+class EventBackend:
+    """Interface de transporte dos eventos entre workers"""
+
+    def start(self, deliver: Deliver) -> None:
+        raise NotImplementedError
+
+    def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        pass
+
+
+class LocalEventBackend(EventBackend):
+    """Entrega os eventos apenas aos assinantes deste worker (um único worker ou desenvolvimento)"""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        if self._deliver is not None:
+            self._deliver(user_id, event)
+
+
+class RedisEventBackend(EventBackend):
+    """
+    Eventos compartilhados entre workers via Redis Pub/Sub.
+
+    Todos os workers assinam um único canal e entregam cada mensagem aos
+    assinantes locais do usuário; o worker que publica recebe a própria
+    mensagem pelo Redis, como os demais.
+    """
+
+    def __init__(self, url: str, channel: str = "fins:events"):
+        import redis  # Dependência opcional, só necessária em deploys multi-worker
+
+        # A thread do Pub/Sub bloqueia lendo o canal; publish() roda no event
+        # loop a cada escrita e usa outro cliente, com timeout curto como os do
+        # cache e do rate limit, para que um Redis travado não pare o worker
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=0.5)
+        self.publisher = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.channel = channel
+        self._pubsub = None
+        self._thread = None
+
+    def start(self, deliver: Deliver) -> None:
+        def on_message(message: Dict[str, Any]) -> None:
+            try:
+                payload = json.loads(message["data"])
+                deliver(payload["user_id"], payload["event"])
+            except Exception as e:
+                logger.warning("Evento inválido recebido do Redis: %s", e)
+
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        self.publisher.publish(self.channel, json.dumps({"user_id": user_id, "event": event}, default=str))
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+class Subscription:
+    """Fila de eventos de uma conexão"""
+
+    def __init__(self, user_id: str, loop: asyncio.AbstractEventLoop, max_size: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(max_size)
+        self.closed = False
+        # Eventos descartados por fila cheia: o cliente deve ressincronizar
+        self.lost = False
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lost = True
+
+    def _close(self) -> None:
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """Próximo evento, ou None quando o barramento é encerrado"""
+        if self.closed:
+            return None
+        event = await self.queue.get()
+        return None if self.closed else event
+
+
+class EventBus:
+    """
+    Pub/sub em processo dos eventos de cada usuário.
+
+    FinancialService publica após cada escrita; as conexões WebSocket do
+    usuário assinam e recebem os eventos. O backend leva a publicação aos
+    demais workers (Redis) ou a entrega diretamente (local). Cada assinatura
+    pertence ao event loop que a criou, e a entrega usa call_soon_threadsafe,
+    então é possível publicar a partir de qualquer thread.
+    """
+
+    def __init__(self, backend: EventBackend, queue_size: int = 100):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self.backend.start(self._deliver)
+
+    def stop(self) -> None:
+        """Encerra o backend e as assinaturas (as conexões são fechadas pelos handlers)"""
+        self.backend.stop()
+        with self._lock:
+            subscriptions = [s for subs in self._subscriptions.values() for s in subs]
+            self._subscriptions.clear()
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription._close)
+
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id: str, event_type: str, **data: Any) -> None:
+        """Publica um evento para o usuário; falhas são registradas e não interrompem a escrita"""
+        event = {"type": event_type, "at": datetime.utcnow().isoformat() + "Z", **data}
+        try:
+            self.backend.publish(user_id, event)
+            EVENTS_PUBLISHED.labels(event_type).inc()
+        except Exception as e:
+            logger.warning("Erro ao publicar evento %s: %s", event_type, e)
+
+    def _deliver(self, user_id: str, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # Loop já encerrado: a conexão não existe mais
+                self.unsubscribe(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subscriptions.values())
+
+
+def build_event_backend() -> EventBackend:
+    """Cria o backend configurado (ou o local, se o Redis não estiver disponível)"""
+    if settings.events_backend == "redis" and settings.redis_url:
+        try:
+            return RedisEventBackend(settings.redis_url)
+        except Exception as e:
+            logger.error("Erro ao inicializar eventos via Redis, usando apenas o worker local: %s", e)
+    return LocalEventBackend()
+
+
+# Instância global do barramento de eventos
+event_bus = EventBus(build_event_backend(), queue_size=settings.events_queue_size)
@@ -0,0 +1,138 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from fastapi import Depends
+from supabase import Client
+from app.database import get_db
+import asyncio
+import threading
+
+_MISSING = object()
+
+
+class IdentityMap:
+    """
+    Mapa de identidade com escopo de requisição.
+
+    Guarda as linhas já lidas por (tabela, coluna única, valor), de modo que
+    cada linha é buscada no máximo uma vez por requisição. Buscas pendentes
+    no mesmo ciclo do event loop são agrupadas em uma única consulta in_.
+    """
+
+    def __init__(self, db: Client):
+        self.db = db
+        self._rows: Dict[Tuple[str, str, Any], Optional[Dict[str, Any]]] = {}
+        self._memo: Dict[Any, Any] = {}
+        self._pending: Dict[Tuple[int, str, str], Dict[Any, asyncio.Future]] = {}
+        self._lock = threading.RLock()
+        self.queries = 0
+
+    def peek(self, table: str, column: str, value: Any) -> Any:
+        """Retorna a linha já carregada (None se inexistente) ou _MISSING"""
+        with self._lock:
+            return self._rows.get((table, column, value), _MISSING)
+
+    def contains(self, table: str, column: str, value: Any) -> bool:
+        return self.peek(table, column, value) is not _MISSING
+
+    def get(self, table: str, column: str, value: Any) -> Optional[Dict[str, Any]]:
+        """Busca uma linha pela coluna única"""
+        return self.get_many(table, column, [value]).get(value)
+
+    def get_many(self, table: str, column: str, values: Iterable[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Busca várias linhas pela coluna única com uma consulta para as ausentes"""
+        values = list(dict.fromkeys(values))
+        with self._lock:
+            missing = [value for value in values if (table, column, value) not in self._rows]
+
+        if missing:
+            query = self.db.table(table).select("*")
+            if len(missing) == 1:
+                query = query.eq(column, missing[0])
+            else:
+                query = query.in_(column, missing)
+            result = query.execute()
+            self.queries += 1
+
+            found = {row[column]: row for row in result.data or []}
+            with self._lock:
+                for value in missing:
+                    # Linhas inexistentes também são lembradas
+                    self._rows[(table, column, value)] = found.get(value)
+
+        with self._lock:
+            rows = {value: self._rows.get((table, column, value)) for value in values}
+        return {value: row for value, row in rows.items() if row is not None}
+
+    async def load(self, table: str, column: str, value: Any) -> Optional[Dict[str, Any]]:
+        """
+        Busca uma linha agrupando chamadas concorrentes.
+
+        Cargas feitas no mesmo ciclo do event loop (por exemplo dentro de um
+        asyncio.gather) são resolvidas juntas por get_many.
+        """
+        row = self.peek(table, column, value)
+        if row is not _MISSING:
+            return row
+
+        loop = asyncio.get_running_loop()
+        batch_key = (id(loop), table, column)
+        with self._lock:
+            batch = self._pending.get(batch_key)
+            if batch is None:
+                batch = self._pending[batch_key] = {}
+                loop.call_soon(self._dispatch, batch_key)
+            future = batch.get(value)
+            if future is None:
+                future = batch[value] = loop.create_future()
+        return await future
+
+    def _dispatch(self, batch_key: Tuple[int, str, str]) -> None:
+        with self._lock:
+            batch = self._pending.pop(batch_key, {})
+        _, table, column = batch_key
+        try:
+            rows = self.get_many(table, column, list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for value, future in batch.items():
+            if not future.done():
+                future.set_result(rows.get(value))
+
+    def put(self, table: str, column: str, row: Dict[str, Any]) -> None:
+        """Registra uma linha lida ou escrita durante a requisição"""
+        with self._lock:
+            self._rows[(table, column, row[column])] = row
+
+    def evict(self, table: str, column: str, value: Any) -> None:
+        """Remove uma linha (por exemplo após um delete)"""
+        with self._lock:
+            self._rows.pop((table, column, value), None)
+
+    async def memo(self, key: Any, factory: Callable[[], Any]) -> Any:
+        """
+        Memoriza o resultado de uma consulta derivada durante a requisição.
+
+        O valor retornado é compartilhado entre os chamadores e não deve ser
+        modificado.
+        """
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = await factory()
+        with self._lock:
+            self._memo[key] = value
+        return value
+
+    def forget(self, key: Any) -> None:
+        """Descarta um resultado memorizado"""
+        with self._lock:
+            self._memo.pop(key, None)
+
+
+async def get_identity_map(db: Client = Depends(get_db)) -> IdentityMap:
+    """Dependency que cria o mapa de identidade da requisição"""
+    # O FastAPI reutiliza o valor de uma dependency dentro da mesma
+    # requisição, então todos os serviços recebem a mesma instância
+    return IdentityMap(db)
@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.metrics import LOG_RECORDS_DROPPED
+from app.tracing import install_log_trace_context
+import threading
+import logging
+import queue
+import time
+import orjson
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [trace=%(trace_id)s span=%(span_id)s] - %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com o contexto de trace"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "trace_id": getattr(record, "trace_id", "-"),
+            "span_id": getattr(record, "span_id", "-"),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return orjson.dumps(entry, default=str).decode("utf-8")
+
+
+class LogRateLimitFilter(logging.Filter):
+    """
+    Limita o volume de logs por logger e amostra mensagens repetidas.
+
+    Cada logger tem um token bucket (LOG_RATE_LIMIT_PER_SECOND, com rajada
+    LOG_RATE_LIMIT_BURST). Uma mesma mensagem (logger, nível e template, sem
+    os argumentos) passa as primeiras LOG_SAMPLE_FIRST vezes em cada janela e
+    depois só uma a cada LOG_SAMPLE_EVERY. O próximo registro emitido traz em
+    `suppressed` quantos foram descartados. CRITICAL nunca é descartado.
+    """
+
+    def __init__(self, rate: float, burst: float, window: float, first: int, every: int, max_keys: int = 10_000):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.window = window
+        self.first = first
+        self.every = max(1, every)
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        # (logger, nível, template) -> [início da janela, ocorrências]
+        self._repeats: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self._suppressed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.CRITICAL:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.levelno, str(record.msg))
+        with self._lock:
+            reason = self._sample(key, now) or self._consume(record.name, now)
+            if reason is not None:
+                self._suppressed[record.name] = self._suppressed.get(record.name, 0) + 1
+            else:
+                record.suppressed = self._suppressed.pop(record.name, 0)
+        if reason is not None:
+            LOG_RECORDS_DROPPED.labels(reason).inc()
+            return False
+        return True
+
+    def _sample(self, key: tuple, now: float) -> Optional[str]:
+        state = self._repeats.get(key)
+        if state is None or now - state[0] >= self.window:
+            state = self._repeats[key] = [now, 0]
+            while len(self._repeats) > self.max_keys:
+                self._repeats.popitem(last=False)
+        self._repeats.move_to_end(key)
+        state[1] += 1
+        count = state[1]
+        if count <= self.first or (count - self.first) % self.every == 0:
+            return None
+        return "sampled"
+
+    def _consume(self, name: str, now: float) -> Optional[str]:
+        tokens, updated_at = self._buckets.get(name, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        if tokens < 1:
+            self._buckets[name] = (tokens, now)
+            return "rate_limited"
+        self._buckets[name] = (tokens - 1, now)
+        return None
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Enfileira o registro sem formatá-lo e nunca bloqueia.
+
+    O QueueHandler padrão formata a mensagem na thread que chamou o logger
+    (para poder enviá-la a outro processo). Aqui a fila é do mesmo processo,
+    então a formatação dos argumentos e da exceção fica para a thread do
+    listener. Com a fila cheia, o registro é descartado e contado.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels("queue_full").inc()
+
+
+def configure_logging() -> None:
+    """
+    Substitui os handlers do logger raiz pelo pipeline configurado.
+
+    Com LOG_QUEUE_ENABLED, a aplicação só enfileira os registros; um listener
+    em segundo plano formata (texto ou JSON) e escreve no stderr. O contexto
+    de trace e o rate limiting são aplicados antes de enfileirar, na thread
+    que gerou o log.
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(settings.log_level.upper())
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+    output = logging.StreamHandler()
+    output.setFormatter(JSONFormatter() if settings.log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    if settings.log_queue_enabled:
+        handler: logging.Handler = LazyQueueHandler(queue.Queue(settings.log_queue_size))
+        _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = output
+
+    handler.addFilter(LogRateLimitFilter(
+        rate=settings.log_rate_limit_per_second,
+        burst=settings.log_rate_limit_burst,
+        window=settings.log_sample_window_seconds,
+        first=settings.log_sample_first,
+        every=settings.log_sample_every,
+    ))
+    root.addHandler(handler)
+    install_log_trace_context()
+
+
+def shutdown_logging() -> None:
+    """Esvazia a fila e encerra o listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
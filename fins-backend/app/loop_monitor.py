@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from typing import Dict, Optional
+from app.config import settings
+from app.metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+import traceback
+import threading
+import asyncio
+import logging
+import time
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Detector de bloqueios do event loop.
+
+    Uma tarefa de heartbeat dorme em intervalos fixos e mede o atraso com
+    que é acordada (lag). Uma thread de vigia acompanha o último heartbeat:
+    se o loop ficar parado além do limite, ela captura a pilha da thread do
+    loop naquele instante (ou seja, o código síncrono que está bloqueando) e
+    a rota da requisição em execução, e registra log e métrica uma vez por
+    episódio de bloqueio.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, stack_limit: int = 30):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = 0.0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._task_routes: Dict[asyncio.Task, str] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat_task is not None
+
+    def start(self) -> None:
+        """Inicia o monitor no event loop atual"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Monitor do event loop iniciado (limite de bloqueio: {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self) -> None:
+        """Encerra o heartbeat e a thread de vigia"""
+        if not self.running:
+            return
+        self._stop.set()
+        self._heartbeat_task.cancel()
+        try:
+            await self._heartbeat_task
+        except asyncio.CancelledError:
+            pass
+        self._heartbeat_task = None
+
+    @contextmanager
+    def track(self, route: str):
+        """Associa a tarefa atual à rota para identificar quem bloqueou o loop"""
+        task = asyncio.current_task()
+        if task is None:
+            yield
+            return
+        self._task_routes[task] = route
+        try:
+            yield
+        finally:
+            self._task_routes.pop(task, None)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            EVENT_LOOP_LAG.observe(max(0.0, now - expected))
+            self._last_tick = now
+
+    def _watch(self) -> None:
+        reported = False
+        check_interval = min(self.interval, self.threshold / 2)
+        while not self._stop.wait(check_interval):
+            stalled = time.monotonic() - self._last_tick - self.interval
+            if stalled < self.threshold:
+                reported = False
+            elif not reported:
+                reported = True
+                self._report(stalled)
+
+    def _current_route(self) -> str:
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        if task is None:
+            # Callbacks fora de tarefas (ex.: call_soon) não pertencem a uma requisição
+            return "desconhecida"
+        return self._task_routes.get(task, "desconhecida")
+
+    def _report(self, stalled: float) -> None:
+        route = self._current_route()
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame, limit=-self.stack_limit)) if frame else "<pilha indisponível>"
+        EVENT_LOOP_BLOCKS.labels(route).inc()
+        logger.warning(
+            f"Event loop bloqueado há {stalled * 1000:.0f} ms na rota {route}; "
+            f"pilha da thread do loop:\n{stack}"
+        )
+
+
+# Instância global do monitor
+loop_monitor = LoopMonitor(
+    interval=settings.loop_monitor_interval_seconds,
+    threshold=settings.loop_monitor_block_threshold_seconds,
+)
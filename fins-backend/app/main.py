@@ -1,20 +1,58 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from app.config import settings
-from app.api import auth, financial, ai
+from app.api import auth, financial, ai, dashboard, events
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.profiling import ProfilingMiddleware, record_query
+from app.middleware.loop_monitor import LoopMonitorMiddleware
+from app.loop_monitor import loop_monitor
+from app.memory_guard import memory_guard
+from app.metrics import observe_query, render_metrics, mark_process_dead
+from app.tracing import configure_tracing, shutdown_tracing, trace_query
+from app.logging_config import configure_logging, shutdown_logging
+from app.database import add_query_interceptor
+from app.resilience import DatabaseUnavailableError, breakers, resilient_query
+from app.cache import profile_cache
+from app.auth.jwt import token_cache, active_user_cache
+from app.container import container
+from app.events import event_bus
+from contextlib import asynccontextmanager
 import logging
 import uvicorn
+import math
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Configuração de logging (fila + listener em segundo plano, texto ou JSON)
+configure_logging()
 logger = logging.getLogger(__name__)
+configure_tracing()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicializa os recursos de longa duração do worker e os libera no encerramento"""
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    await container.start()
+    event_bus.start()
+    if settings.memory_guard_enabled:
+        memory_guard.start(container)
+    try:
+        yield
+    finally:
+        # Fecha as conexões WebSocket para que os clientes reconectem em outro worker
+        event_bus.stop()
+        await memory_guard.stop()
+        await container.stop()
+        await loop_monitor.stop()
+        mark_process_dead()
+        shutdown_tracing()
+        shutdown_logging()
 
 # Criação da aplicação FastAPI
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.project_name,
     description=settings.description,
     version=settings.version,
@@ -23,6 +61,33 @@ app = FastAPI(
     openapi_url="/openapi.json"
 )
 
+# Circuit breaker e retentativas em volta de cada consulta (interceptador mais
+# externo, para que métricas, traces e perfilamento registrem cada tentativa)
+add_query_interceptor(resilient_query)
+
+# Compressão das respostas (mais interna, para que seu custo apareça nas
+# métricas, no perfilamento e no monitor do event loop)
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware)
+
+# Perfilamento sob demanda (mais interno, para medir apenas a aplicação)
+if settings.profiler_enabled:
+    app.add_middleware(ProfilingMiddleware)
+    add_query_interceptor(record_query)
+
+# Associa requisições às rotas nos relatórios de bloqueio do event loop
+if settings.loop_monitor_enabled:
+    app.add_middleware(LoopMonitorMiddleware, monitor=loop_monitor)
+
+# Rate limiting (adicionado antes do CORS para que respostas 429 recebam os cabeçalhos de CORS)
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware)
+
+# Métricas de latência por rota (inclui as respostas 429 do rate limiting)
+app.add_middleware(MetricsMiddleware)
+add_query_interceptor(observe_query)
+add_query_interceptor(trace_query)
+
 # Configuração de CORS
 app.add_middleware(
     CORSMiddleware,
@@ -36,11 +101,22 @@ app.add_middleware(
 app.include_router(auth.router, prefix=settings.api_v1_str)
 app.include_router(financial.router, prefix=settings.api_v1_str)
 app.include_router(ai.router, prefix=settings.api_v1_str)
+app.include_router(dashboard.router, prefix=settings.api_v1_str)
+app.include_router(events.router, prefix=settings.api_v1_str)
 
 # Middleware para tratamento de erros
+@app.exception_handler(DatabaseUnavailableError)
+async def database_unavailable_handler(request, exc):
+    logger.warning("Banco indisponível: %s", exc)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Serviço temporariamente indisponível"},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    logger.error(f"Erro não tratado: {exc}")
+    logger.error("Erro não tratado em %s %s: %s", request.method, request.url.path, exc, exc_info=exc)
     return JSONResponse(
         status_code=500,
         content={"detail": "Erro interno do servidor"}
@@ -67,8 +143,36 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "FINS API",
-        "version": settings.version
+        "version": settings.version,
+        "database": {"circuits": {name: breaker.state for name, breaker in breakers.items()}},
+        "memory": memory_guard.status(),
+        "caches": {
+            cache.name: cache.stats()
+            for cache in (profile_cache, token_cache, active_user_cache)
+        }
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Prontidão do worker para receber tráfego
+
+    Diferente do /health (processo vivo), responde 503 até os serviços
+    serem criados e aquecidos e durante o encerramento.
+    """
+    content = {
+        "status": "ready" if container.ready else ("draining" if container.draining else "starting"),
+        "warmup": container.warmup_status,
     }
+    return JSONResponse(status_code=200 if container.ready else 503, content=content)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Métricas no formato Prometheus
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
 
 @app.get("/info")
 async def api_info():
@@ -82,7 +186,8 @@ async def api_info():
         "endpoints": {
             "auth": f"{settings.api_v1_str}/auth",
             "financial": f"{settings.api_v1_str}/financial",
-            "ai": f"{settings.api_v1_str}/ai"
+            "ai": f"{settings.api_v1_str}/ai",
+            "dashboard": f"{settings.api_v1_str}/dashboard"
         },
         "documentation": {
             "swagger": "/docs",
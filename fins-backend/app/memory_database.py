@@ -0,0 +1,461 @@
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from postgrest.exceptions import APIError
+import threading
+import random
+import uuid
+import time
+import re
+
+# Restrições e índices equivalentes aos de scripts/setup_database.sql e das
+# migrações; tabelas não listadas são criadas sob demanda só com a chave primária
+TABLE_SCHEMAS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "users": {"unique": ("email",), "indexes": ("email", "is_active")},
+    "financial_profiles": {"unique": ("user_id",), "indexes": ("user_id",)},
+    "expenses": {"unique": (), "indexes": ("user_id", "category")},
+    "receipts": {"unique": (), "indexes": ("user_id",)},
+    "deleted_records": {"unique": (), "indexes": ("user_id",)},
+}
+
+
+def _to_json_value(value: Any) -> Any:
+    """Converte o valor como ele voltaria do PostgREST (ida e volta em JSON)"""
+    if isinstance(value, dict):
+        return {str(k): _to_json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_to_json_value(v) for v in value]
+    if isinstance(value, Enum):
+        return _to_json_value(value.value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _copy_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    # Cópia rasa mais um nível para colunas JSON, evitando que o chamador altere a tabela
+    return {k: (v.copy() if isinstance(v, (dict, list)) else v) for k, v in row.items()}
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "+00:00"
+
+
+def _comparable(stored: Any, value: Any) -> Any:
+    """Ajusta o valor do filtro ao tipo da coluna, como o cast do Postgres"""
+    if isinstance(stored, bool) and isinstance(value, str):
+        return value.lower() == "true"
+    if isinstance(stored, (int, float)) and not isinstance(stored, bool) and isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _split_logic(expr: str) -> List[str]:
+    """Separa as condições de um filtro lógico nas vírgulas de primeiro nível"""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, c in enumerate(expr):
+        if c == '"':
+            quoted = not quoted
+        elif not quoted and c == "(":
+            depth += 1
+        elif not quoted and c == ")":
+            depth -= 1
+        elif not quoted and c == "," and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _parse_logic(expr: str) -> List[Tuple[str, str, Any]]:
+    """Converte a sintaxe de or=(...) do PostgREST em condições (coluna, operador, valor)"""
+    conditions = []
+    for part in _split_logic(expr):
+        for op in ("and", "or"):
+            if part.startswith(f"{op}(") and part.endswith(")"):
+                conditions.append(("", op, _parse_logic(part[len(op) + 1:-1])))
+                break
+        else:
+            column, op, value = part.split(".", 2)
+            if len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+            conditions.append((column, op, value))
+    return conditions
+
+
+def _like(pattern: str, flags: int = 0) -> "re.Pattern":
+    regex = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.compile(f"^{regex}$", flags | re.DOTALL)
+
+
+class MemoryTable:
+    """Tabela indexada em memória com chave primária id"""
+
+    def __init__(self, name: str, unique: Iterable[str] = (), indexes: Iterable[str] = ()):
+        self.name = name
+        self.unique = tuple(unique)
+        self.rows: Dict[Any, Dict[str, Any]] = {}
+        # Índices hash: coluna -> valor -> ids (dict para manter a ordem de inserção)
+        self.indexes: Dict[str, Dict[Any, Dict[Any, None]]] = {
+            column: defaultdict(dict) for column in dict.fromkeys(tuple(indexes) + self.unique)
+        }
+
+    def _index_add(self, row: Dict[str, Any]) -> None:
+        for column, index in self.indexes.items():
+            index[row.get(column)][row["id"]] = None
+
+    def _index_remove(self, row: Dict[str, Any]) -> None:
+        for column, index in self.indexes.items():
+            ids = index.get(row.get(column))
+            if ids is not None:
+                ids.pop(row["id"], None)
+                if not ids:
+                    del index[row.get(column)]
+
+    def _check_unique(self, row: Dict[str, Any], ignore_id: Any = None) -> None:
+        if row["id"] in self.rows and row["id"] != ignore_id:
+            raise APIError({
+                "message": f'duplicate key value violates unique constraint "{self.name}_pkey"',
+                "code": "23505", "hint": None, "details": f"Key (id)=({row['id']}) already exists.",
+            })
+        for column in self.unique:
+            value = row.get(column)
+            if value is None:
+                continue
+            if any(other != ignore_id for other in self.indexes[column].get(value, ())):
+                raise APIError({
+                    "message": f'duplicate key value violates unique constraint "{self.name}_{column}_key"',
+                    "code": "23505", "hint": None, "details": f"Key ({column})=({value}) already exists.",
+                })
+
+    def insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        now = _now()
+        row = {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, **row}
+        self._check_unique(row)
+        self.rows[row["id"]] = row
+        self._index_add(row)
+        return row
+
+    def update(self, row_id: Any, values: Dict[str, Any]) -> Dict[str, Any]:
+        current = self.rows[row_id]
+        # Equivalente ao trigger update_updated_at_column
+        updated = {**current, **values, "updated_at": _now()}
+        self._check_unique(updated, ignore_id=row_id)
+        self._index_remove(current)
+        if updated["id"] != row_id:
+            del self.rows[row_id]
+        self.rows[updated["id"]] = updated
+        self._index_add(updated)
+        return updated
+
+    def delete(self, row_id: Any) -> Dict[str, Any]:
+        row = self.rows.pop(row_id)
+        self._index_remove(row)
+        return row
+
+    def candidates(self, filters: List[Tuple[str, str, Any]]) -> Iterable[Dict[str, Any]]:
+        """Usa o primeiro filtro de igualdade indexado para reduzir a varredura"""
+        for column, op, value in filters:
+            if column == "id" and op in ("eq", "in"):
+                ids = [value] if op == "eq" else dict.fromkeys(value)
+                return [self.rows[i] for i in ids if i in self.rows]
+            if op == "eq" and column in self.indexes:
+                return [self.rows[i] for i in self.indexes[column].get(value, ())]
+            if op == "in" and column in self.indexes:
+                return [self.rows[i] for v in dict.fromkeys(value) for i in self.indexes[column].get(v, ())]
+        return list(self.rows.values())
+
+
+class MemoryResponse:
+    """Resposta com a mesma interface do APIResponse do postgrest"""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class MemoryQueryBuilder:
+    """Subconjunto do query builder do PostgREST executado sobre MemoryTable"""
+
+    _OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+        "eq": lambda a, b: a == b,
+        "neq": lambda a, b: a != b,
+        "gt": lambda a, b: a is not None and a > b,
+        "gte": lambda a, b: a is not None and a >= b,
+        "lt": lambda a, b: a is not None and a < b,
+        "lte": lambda a, b: a is not None and a <= b,
+    }
+
+    def __init__(self, db: "MemoryClient", table: str):
+        self._db = db
+        self._table = table
+        self._method = "select"
+        self._columns: Optional[List[str]] = None
+        self._count: Optional[str] = None
+        self._payload: Any = None
+        self._on_conflict = "id"
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._logic_params: List[str] = []
+        self._order: List[Tuple[str, bool, Optional[bool]]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._single: Optional[str] = None
+
+    @property
+    def params(self) -> str:
+        """Descrição da consulta no formato da query string do PostgREST"""
+        parts = [f"{column}={op}.{value}" for column, op, value in self._filters if column]
+        parts += self._logic_params
+        parts += [f"order={column}.{'desc' if desc else 'asc'}" for column, desc, _ in self._order]
+        if self._offset:
+            parts.append(f"offset={self._offset}")
+        if self._limit is not None:
+            parts.append(f"limit={self._limit}")
+        return "&".join(parts)
+
+    # Operações
+    def select(self, *columns: str, count: Optional[str] = None) -> "MemoryQueryBuilder":
+        names = [c.strip() for column in (columns or ("*",)) for c in column.split(",")]
+        self._columns = None if "*" in names else names
+        self._count = count
+        return self
+
+    def insert(self, json: Any, count: Optional[str] = None, upsert: bool = False, **kwargs) -> "MemoryQueryBuilder":
+        self._method = "upsert" if upsert else "insert"
+        self._payload = json
+        self._count = count
+        return self
+
+    def upsert(self, json: Any, count: Optional[str] = None, on_conflict: str = "", **kwargs) -> "MemoryQueryBuilder":
+        self._method = "upsert"
+        self._payload = json
+        self._count = count
+        self._on_conflict = on_conflict or "id"
+        return self
+
+    def update(self, json: Dict[str, Any], count: Optional[str] = None, **kwargs) -> "MemoryQueryBuilder":
+        self._method = "update"
+        self._payload = json
+        self._count = count
+        return self
+
+    def delete(self, count: Optional[str] = None, **kwargs) -> "MemoryQueryBuilder":
+        self._method = "delete"
+        self._count = count
+        return self
+
+    # Filtros
+    def _filter(self, column: str, op: str, value: Any) -> "MemoryQueryBuilder":
+        self._filters.append((column, op, _to_json_value(value)))
+        return self
+
+    def eq(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._filter(column, "lte", value)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "MemoryQueryBuilder":
+        return self._filter(column, "in", list(values))
+
+    def is_(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._filter(column, "is", value)
+
+    def like(self, column: str, pattern: str) -> "MemoryQueryBuilder":
+        return self._filter(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str) -> "MemoryQueryBuilder":
+        return self._filter(column, "ilike", pattern)
+
+    def or_(self, filters: str, **kwargs) -> "MemoryQueryBuilder":
+        self._filters.append(("", "or", _parse_logic(filters)))
+        self._logic_params.append(f"or=({filters})")
+        return self
+
+    # Modificadores
+    def order(self, column: str, desc: bool = False, nullsfirst: Optional[bool] = None, **kwargs) -> "MemoryQueryBuilder":
+        self._order.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, **kwargs) -> "MemoryQueryBuilder":
+        self._limit = size
+        return self
+
+    def offset(self, size: int) -> "MemoryQueryBuilder":
+        self._offset = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> "MemoryQueryBuilder":
+        # Assim como no PostgREST, o intervalo é inclusivo
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def single(self) -> "MemoryQueryBuilder":
+        self._single = "single"
+        return self
+
+    def maybe_single(self) -> "MemoryQueryBuilder":
+        self._single = "maybe_single"
+        return self
+
+    # Execução
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        return all(self._condition(row, column, op, value) for column, op, value in self._filters)
+
+    def _condition(self, row: Dict[str, Any], column: str, op: str, value: Any) -> bool:
+        if op == "and":
+            return all(self._condition(row, *condition) for condition in value)
+        if op == "or":
+            return any(self._condition(row, *condition) for condition in value)
+        stored = row.get(column)
+        if op == "in":
+            return stored in {_comparable(stored, v) for v in value}
+        if op == "is":
+            expected = None if value in (None, "null") else value
+            if isinstance(expected, str):
+                expected = expected.lower() == "true"
+            return stored is expected or stored == expected
+        if op in ("like", "ilike"):
+            return stored is not None and bool(_like(value, re.IGNORECASE if op == "ilike" else 0).match(str(stored)))
+        try:
+            return self._OPERATORS[op](stored, _comparable(stored, value))
+        except TypeError:
+            return False
+
+    def _sorted(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Ordenações estáveis aplicadas da última chave para a primeira
+        for column, desc, nullsfirst in reversed(self._order):
+            nulls = [row for row in rows if row.get(column) is None]
+            values = sorted((row for row in rows if row.get(column) is not None), key=lambda row: row[column], reverse=desc)
+            # Padrão do Postgres: NULLS LAST em ASC e NULLS FIRST em DESC
+            first = desc if nullsfirst is None else nullsfirst
+            rows = nulls + values if first else values + nulls
+        return rows
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if self._columns is None:
+            return _copy_row(row)
+        return {column: _to_json_value(row.get(column)) for column in self._columns}
+
+    def _run(self, table: MemoryTable) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        if self._method in ("insert", "upsert"):
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            rows = []
+            for values in payload:
+                values = _to_json_value(values)
+                existing = None
+                if self._method == "upsert" and values.get(self._on_conflict) is not None:
+                    existing = next(iter(table.candidates([(self._on_conflict, "eq", values[self._on_conflict])])), None)
+                rows.append(table.update(existing["id"], values) if existing else table.insert(values))
+            return rows, len(rows)
+
+        matched = [row for row in table.candidates(self._filters) if self._matches(row)]
+        if self._method == "update":
+            values = _to_json_value(self._payload)
+            rows = [table.update(row["id"], values) for row in matched]
+            return rows, len(rows)
+        if self._method == "delete":
+            rows = [table.delete(row["id"]) for row in matched]
+            return rows, len(rows)
+
+        total = len(matched)
+        rows = self._sorted(matched)
+        end = None if self._limit is None else self._offset + self._limit
+        return rows[self._offset:end], total
+
+    def execute(self) -> MemoryResponse:
+        self._db.simulate_latency()
+        with self._db.lock:
+            rows, total = self._run(self._db.get_table(self._table))
+            data = [self._project(row) for row in rows]
+
+        count = total if self._count else None
+        if self._single is None:
+            return MemoryResponse(data, count)
+        if len(data) > 1 or (not data and self._single == "single"):
+            raise APIError({
+                "message": "JSON object requested, multiple (or no) rows returned",
+                "code": "PGRST116", "hint": None, "details": f"The result contains {len(data)} rows",
+            })
+        return MemoryResponse(data[0] if data else None, count)
+
+
+class MemoryClient:
+    """
+    Substituto em memória do cliente Supabase.
+
+    Implementa o subconjunto do query builder usado pelos serviços sobre
+    tabelas com índices hash, restrições de unicidade e o trigger de
+    updated_at, com latência opcional injetada em cada execute() para
+    simular a rede de forma determinística.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.lock = threading.RLock()
+        self.tables: Dict[str, MemoryTable] = {
+            name: MemoryTable(name, **schema) for name, schema in TABLE_SCHEMAS.items()
+        }
+        self._random = random.Random(seed)
+
+    def get_table(self, name: str) -> MemoryTable:
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = MemoryTable(name)
+        return table
+
+    def simulate_latency(self) -> None:
+        if self.latency or self.jitter:
+            # Bloqueia como a chamada HTTP síncrona do cliente real
+            time.sleep(max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter)))
+
+    def table(self, table_name: str) -> MemoryQueryBuilder:
+        return MemoryQueryBuilder(self, table_name)
+
+    def from_(self, table_name: str) -> MemoryQueryBuilder:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: dict = None) -> MemoryQueryBuilder:
+        raise APIError({
+            "message": f"Could not find the function public.{fn}",
+            "code": "PGRST202", "hint": None, "details": "Funções não são suportadas pelo banco em memória",
+        })
+
+    def load(self, tables: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Carrega linhas já no formato do PostgREST (sem cópia nem conversão)"""
+        with self.lock:
+            for name, rows in tables.items():
+                table = self.get_table(name)
+                for row in rows:
+                    table.rows[row["id"]] = row
+                    table._index_add(row)
+
+    def reset(self) -> None:
+        """Remove todos os dados"""
+        with self.lock:
+            for name in list(self.tables):
+                schema = TABLE_SCHEMAS.get(name, {})
+                self.tables[name] = MemoryTable(name, **schema)
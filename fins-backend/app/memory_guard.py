@@ -0,0 +1,299 @@
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, status
+from app.auth.jwt import get_current_active_user
+from app.config import settings
+from app.metrics import AI_WORK_REJECTED, WORKER_RECYCLES, WORKER_RSS_BYTES
+import asyncio
+import ctypes
+import logging
+import signal
+import time
+import gc
+import os
+
+try:
+    import psutil
+except ImportError:  # psutil é opcional; no Linux o RSS vem de /proc
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+# gc.collect() segura o GIL; sob pressão contínua a compactação não é repetida a cada amostra
+_TRIM_INTERVAL_SECONDS = 60.0
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# Limites usados fora de um container com memória limitada
+_DEFAULT_SOFT_LIMIT_MB = 1536
+_DEFAULT_HARD_LIMIT_MB = 2048
+# cgroup v2 e v1; no v1 "sem limite" é um valor próximo de 2^63
+_CGROUP_LIMIT_FILES = ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes")
+
+
+def read_rss_bytes() -> Optional[int]:
+    """Memória residente atual do processo (None se não for possível medir)"""
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+def read_container_memory_limit() -> Optional[int]:
+    """Limite de memória do container (cgroup), ou None se não houver"""
+    for path in _CGROUP_LIMIT_FILES:
+        try:
+            with open(path) as limit_file:
+                raw = limit_file.read().strip()
+        except OSError:
+            continue
+        if raw == "max":
+            return None
+        try:
+            limit = int(raw)
+        except ValueError:
+            return None
+        return limit if limit < 1 << 60 else None
+    return None
+
+
+def memory_limits() -> Tuple[int, int]:
+    """
+    Limites suave e rígido do worker, em bytes.
+
+    Os valores configurados têm precedência. Sem eles, os limites saem da
+    fatia de cada worker no limite do container: num plano de 512 MB com 3
+    workers, o container seria morto por falta de memória muito antes de
+    limites fixos de alguns GB serem atingidos.
+    """
+    soft = settings.memory_soft_limit_mb * _MB
+    hard = settings.memory_hard_limit_mb * _MB
+    container_limit = read_container_memory_limit()
+    if container_limit is not None:
+        share = container_limit // max(1, settings.web_concurrency)
+        hard = hard or int(share * 0.9)
+        soft = soft or int(share * 0.75)
+    return soft or _DEFAULT_SOFT_LIMIT_MB * _MB, hard or _DEFAULT_HARD_LIMIT_MB * _MB
+
+
+def _load_malloc_trim() -> Any:
+    try:
+        return ctypes.CDLL("libc.so.6").malloc_trim
+    except (OSError, AttributeError):
+        # Fora da glibc (macOS, musl) só o coletor de lixo é executado
+        return None
+
+
+_malloc_trim = _load_malloc_trim()
+
+
+def trim_memory() -> None:
+    """Coleta ciclos e devolve ao sistema as páginas livres do heap (glibc)"""
+    gc.collect()
+    if _malloc_trim is not None:
+        _malloc_trim(0)
+
+
+class MemoryGuard:
+    """
+    Vigia da memória do worker.
+
+    Os ajustes do Prophet/Stan e os DataFrames grandes fragmentam o heap, e o
+    RSS do worker cresce ao longo de horas. Uma tarefa no event loop mede o
+    RSS periodicamente. Acima do limite suave, tenta devolver memória ao
+    sistema e, se não bastar, as novas análises de IA são recusadas com 503.
+    Acima do limite rígido, ou depois de `max_ai_computations` análises, o
+    worker deixa de ficar pronto, espera as análises em andamento e envia
+    SIGTERM a si mesmo: o encerramento gracioso roda e o gerenciador de
+    processos (gunicorn ou o orquestrador) sobe um worker novo.
+    """
+
+    def __init__(
+        self,
+        soft_limit_bytes: int,
+        hard_limit_bytes: int,
+        max_ai_computations: int = 0,
+        interval: float = 5.0,
+        drain_seconds: float = 30.0,
+    ):
+        self.soft_limit_bytes = soft_limit_bytes
+        self.hard_limit_bytes = hard_limit_bytes
+        self.max_ai_computations = max_ai_computations
+        self.interval = interval
+        self.drain_seconds = drain_seconds
+        self.rss_bytes: Optional[int] = None
+        self.under_pressure = False
+        self.recycling = False
+        self.ai_computations = 0
+        self.active_ai_computations = 0
+        self._container: Any = None
+        self._task: Optional[asyncio.Task] = None
+        self._recycle_task: Optional[asyncio.Task] = None
+        self._last_trim = float("-inf")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, container: Any) -> None:
+        """Inicia a vigia no event loop atual; `container` é marcado como drenando ao reciclar"""
+        if self.running:
+            return
+        rss = read_rss_bytes()
+        if rss is None:
+            logger.warning("RSS do processo indisponível nesta plataforma; guarda de memória desativado")
+            return
+        if rss >= self.soft_limit_bytes:
+            # O worker recém-iniciado já estaria acima do limite: reciclaria em ciclo
+            logger.warning(
+                "RSS inicial do worker (%.0f MB) acima do limite suave (%.0f MB); guarda de memória "
+                "desativado. Reduza WEB_CONCURRENCY ou ajuste MEMORY_SOFT_LIMIT_MB/MEMORY_HARD_LIMIT_MB",
+                rss / _MB, self.soft_limit_bytes / _MB,
+            )
+            return
+        self._container = container
+        self._task = asyncio.get_running_loop().create_task(self._watch())
+        logger.info(
+            "Guarda de memória iniciado (suave: %.0f MB, rígido: %.0f MB, reciclagem após %s análises)",
+            self.soft_limit_bytes / _MB, self.hard_limit_bytes / _MB, self.max_ai_computations or "∞",
+        )
+
+    async def stop(self) -> None:
+        for task in (self._task, self._recycle_task):
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._recycle_task = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "rss_mb": round(self.rss_bytes / _MB, 1) if self.rss_bytes is not None else None,
+            "soft_limit_mb": round(self.soft_limit_bytes / _MB),
+            "hard_limit_mb": round(self.hard_limit_bytes / _MB),
+            "under_pressure": self.under_pressure,
+            "recycling": self.recycling,
+            "ai_computations": self.ai_computations,
+        }
+
+    def refusal_reason(self) -> Optional[str]:
+        """Motivo para recusar uma nova análise de IA, ou None para aceitá-la"""
+        if not self.running:
+            return None
+        if self.recycling:
+            return "recycling"
+        # Leitura nova: entre duas amostras uma análise pode ter elevado o RSS
+        if self._sample() >= self.soft_limit_bytes:
+            return "memory"
+        return None
+
+    def begin_ai_computation(self) -> None:
+        self.active_ai_computations += 1
+
+    def end_ai_computation(self, completed: bool = True) -> None:
+        self.active_ai_computations -= 1
+        if not completed:
+            return
+        self.ai_computations += 1
+        if self.running and self.max_ai_computations and self.ai_computations >= self.max_ai_computations:
+            self._recycle("ai_computations")
+
+    def _sample(self) -> int:
+        rss = read_rss_bytes() or 0
+        self.rss_bytes = rss
+        WORKER_RSS_BYTES.set(rss)
+        return rss
+
+    async def _watch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            rss = self._sample()
+            if (
+                rss >= self.soft_limit_bytes
+                and not self.recycling
+                and time.monotonic() - self._last_trim >= _TRIM_INTERVAL_SECONDS
+            ):
+                # Memória liberada pelo Python nem sempre volta ao sistema sem malloc_trim
+                self._last_trim = time.monotonic()
+                await loop.run_in_executor(None, trim_memory)
+                freed = max(0, rss - self._sample())
+                logger.info("Memória compactada: %.1f MB devolvidos ao sistema", freed / _MB)
+                rss = self.rss_bytes
+            if rss >= self.hard_limit_bytes:
+                self._recycle("hard_limit")
+            pressure = rss >= self.soft_limit_bytes
+            if pressure != self.under_pressure:
+                self.under_pressure = pressure
+                if pressure:
+                    logger.warning("RSS do worker em %.0f MB, acima do limite suave; novas análises de IA serão recusadas", rss / _MB)
+                else:
+                    logger.info("RSS do worker em %.0f MB, abaixo do limite suave; análises de IA liberadas", rss / _MB)
+
+    def _recycle(self, reason: str) -> None:
+        if self.recycling:
+            return
+        self.recycling = True
+        WORKER_RECYCLES.labels(reason).inc()
+        rss = self.rss_bytes or 0
+        logger.warning(
+            "Reciclando o worker (motivo: %s, RSS: %.0f MB, análises de IA: %d)",
+            reason, rss / _MB, self.ai_computations,
+        )
+        if self._container is not None:
+            # /ready responde 503 a partir daqui
+            self._container.ready = False
+            self._container.draining = True
+        self._recycle_task = asyncio.get_running_loop().create_task(self._drain_and_exit())
+
+    async def _drain_and_exit(self) -> None:
+        deadline = time.monotonic() + self.drain_seconds
+        while self.active_ai_computations > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self.active_ai_computations > 0:
+            logger.warning("%d análises de IA ainda em andamento ao reciclar o worker", self.active_ai_computations)
+        # Mesmo caminho de um encerramento pelo gerenciador: lifespan, drenagem e saída
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+async def admit_ai_work(current_user: dict = Depends(get_current_active_user)) -> AsyncIterator[None]:
+    """
+    Dependency das rotas de IA pesadas.
+
+    Depende da autenticação para que requisições sem token recebam 401 e
+    não contem para a reciclagem. Recusa a análise com 503 quando o worker
+    está sob pressão de memória ou sendo reciclado (outro worker pode
+    atendê-la) e conta apenas as análises concluídas para a reciclagem
+    periódica.
+    """
+    reason = memory_guard.refusal_reason()
+    if reason is not None:
+        AI_WORK_REJECTED.labels(reason).inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor sem capacidade para análises no momento; tente novamente em instantes",
+            headers={"Retry-After": str(max(1, round(memory_guard.interval)))},
+        )
+    memory_guard.begin_ai_computation()
+    completed = False
+    try:
+        yield
+        completed = True
+    finally:
+        memory_guard.end_ai_computation(completed)
+
+
+# Instância global do guarda de memória (iniciada no lifespan da aplicação)
+_soft_limit_bytes, _hard_limit_bytes = memory_limits()
+memory_guard = MemoryGuard(
+    soft_limit_bytes=_soft_limit_bytes,
+    hard_limit_bytes=_hard_limit_bytes,
+    max_ai_computations=settings.ai_max_computations_per_worker,
+    interval=settings.memory_check_interval_seconds,
+    drain_seconds=settings.memory_recycle_drain_seconds,
+)
@@ -0,0 +1,169 @@
+from typing import Any, Callable, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+import functools
+import os
+import time
+
+# Com vários workers (gunicorn/uvicorn --workers), defina PROMETHEUS_MULTIPROC_DIR
+# apontando para um diretório vazio antes de iniciar o servidor: cada processo
+# grava suas métricas ali e o /metrics agrega todos eles
+MULTIPROCESS_ENABLED = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "fins_http_request_duration_seconds",
+    "Latência das requisições HTTP",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "fins_http_requests_in_flight",
+    "Requisições HTTP em andamento",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+DB_QUERY_DURATION = Histogram(
+    "fins_db_query_duration_seconds",
+    "Latência das consultas ao banco por tabela e operação",
+    ["table", "operation"],
+    buckets=_LATENCY_BUCKETS,
+)
+DB_QUERY_ERRORS = Counter(
+    "fins_db_query_errors_total",
+    "Consultas ao banco que falharam",
+    ["table", "operation"],
+)
+AI_ANALYSIS_DURATION = Histogram(
+    "fins_ai_analysis_duration_seconds",
+    "Duração das análises do AIService",
+    ["analysis"],
+    buckets=_LATENCY_BUCKETS,
+)
+AI_MODEL_FIT_DURATION = Histogram(
+    "fins_ai_model_fit_duration_seconds",
+    "Duração do ajuste dos modelos de IA",
+    ["model"],
+    buckets=_LATENCY_BUCKETS,
+)
+DB_QUERY_RETRIES = Counter(
+    "fins_db_query_retries_total",
+    "Novas tentativas de consultas após falhas passageiras do banco",
+    ["table", "operation"],
+)
+DB_QUERY_REJECTED = Counter(
+    "fins_db_query_rejected_total",
+    "Consultas recusadas sem execução pelo circuit breaker aberto",
+    ["table", "operation"],
+)
+DB_READ_ROUTING = Counter(
+    "fins_db_read_routing_total",
+    "Leituras por cliente escolhido (primary ou replica) e motivo da escolha",
+    ["client", "reason"],
+)
+DB_CIRCUIT_STATE = Gauge(
+    "fins_db_circuit_state",
+    "Estado do circuit breaker do banco (0 fechado, 1 meio-aberto, 2 aberto)",
+    ["client"],
+    multiprocess_mode="livemax",
+)
+DB_CIRCUIT_TRANSITIONS = Counter(
+    "fins_db_circuit_transitions_total",
+    "Mudanças de estado do circuit breaker do banco, pelo novo estado",
+    ["client", "state"],
+)
+CACHE_REQUESTS = Counter(
+    "fins_cache_requests_total",
+    "Consultas aos caches (a taxa de acerto é hit / total; stale são entradas expiradas servidas com o banco indisponível)",
+    ["cache", "result"],
+)
+COMPRESSION_BYTES = Counter(
+    "fins_compression_bytes_total",
+    "Bytes das respostas comprimidas antes (in) e depois (out) da compressão",
+    ["encoding", "direction"],
+)
+EVENTS_PUBLISHED = Counter(
+    "fins_events_published_total",
+    "Eventos publicados para os canais em tempo real",
+    ["type"],
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    "fins_websocket_connections",
+    "Conexões WebSocket de eventos abertas",
+    multiprocess_mode="livesum",
+)
+LOG_RECORDS_DROPPED = Counter(
+    "fins_log_records_dropped_total",
+    "Registros de log descartados por amostragem, rate limiting ou fila cheia",
+    ["reason"],
+)
+WORKER_RSS_BYTES = Gauge(
+    "fins_worker_rss_bytes",
+    "Memória residente (RSS) de cada worker",
+    multiprocess_mode="liveall",
+)
+AI_WORK_REJECTED = Counter(
+    "fins_ai_work_rejected_total",
+    "Análises de IA recusadas por pressão de memória ou reciclagem do worker",
+    ["reason"],
+)
+WORKER_RECYCLES = Counter(
+    "fins_worker_recycles_total",
+    "Reciclagens de worker iniciadas pelo guarda de memória",
+    ["reason"],
+)
+EVENT_LOOP_LAG = Histogram(
+    "fins_event_loop_lag_seconds",
+    "Atraso do event loop em relação ao agendado",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "fins_event_loop_blocks_total",
+    "Bloqueios do event loop acima do limite, pela rota em execução",
+    ["route"],
+)
+
+
+def observe_query(context: Any, proceed: Callable[[], Any]) -> Any:
+    """Interceptador de consultas que registra contagem, latência e erros"""
+    start = time.perf_counter()
+    try:
+        return proceed()
+    except Exception:
+        DB_QUERY_ERRORS.labels(context.table, context.operation).inc()
+        raise
+    finally:
+        DB_QUERY_DURATION.labels(context.table, context.operation).observe(time.perf_counter() - start)
+
+
+def track_analysis(name: str):
+    """Decorator que mede a duração de um método assíncrono de análise"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                AI_ANALYSIS_DURATION.labels(name).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Gera o texto de exposição, agregando os workers em modo multiprocesso"""
+    if MULTIPROCESS_ENABLED:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Remove as métricas 'live' deste worker ao encerrar"""
+    if MULTIPROCESS_ENABLED:
+        multiprocess.mark_process_dead(os.getpid())
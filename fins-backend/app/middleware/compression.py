@@ -0,0 +1,231 @@
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.metrics import COMPRESSION_BYTES
+import logging
+import zlib
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele o "br" não é oferecido
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard é opcional; sem ele o "zstd" não é oferecido
+    zstandard = None
+
+
+class Compressor:
+    """Compressor incremental de um único corpo de resposta"""
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Comprime um trecho; com flush=True o cliente já consegue decodificá-lo"""
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        raise NotImplementedError
+
+
+class GzipCompressor(Compressor):
+    def __init__(self, level: int):
+        # wbits=31: formato gzip (cabeçalho + CRC) em vez de zlib puro
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        out = self._obj.compress(data)
+        return out + self._obj.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class BrotliCompressor(Compressor):
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        out = self._obj.process(data)
+        return out + self._obj.flush() if flush else out
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class ZstdCompressor(Compressor):
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        out = self._obj.compress(data)
+        return out + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if flush else out
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def available_codecs() -> Dict[str, Callable[[], Compressor]]:
+    """Codificações suportadas neste ambiente, com os níveis das Settings"""
+    codecs: Dict[str, Callable[[], Compressor]] = {
+        "gzip": lambda: GzipCompressor(settings.compression_gzip_level),
+    }
+    if brotli is not None:
+        codecs["br"] = lambda: BrotliCompressor(settings.compression_brotli_quality)
+    if zstandard is not None:
+        codecs["zstd"] = lambda: ZstdCompressor(settings.compression_zstd_level)
+    return codecs
+
+
+@lru_cache(maxsize=256)
+def negotiate_encoding(accept_encoding: str, preference: Tuple[str, ...]) -> Optional[str]:
+    """
+    Escolhe a codificação pelo Accept-Encoding do cliente.
+
+    Vence o maior q; em caso de empate, a ordem de preferência do servidor.
+    O cabeçalho se repete muito entre clientes, por isso o resultado é cacheado.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for encoding in preference:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Comprime as respostas com gzip, brotli ou zstd conforme o Accept-Encoding.
+
+    Só comprime tipos de conteúdo da lista permitida e corpos a partir de um
+    tamanho mínimo. Respostas em streaming (exportações) são comprimidas
+    trecho a trecho, com flush a cada trecho para não atrasar a entrega.
+    Corpos grandes são comprimidos em uma thread para não bloquear o event loop.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        encodings: Optional[Iterable[str]] = None,
+        content_types: Optional[Iterable[str]] = None,
+        offload_bytes: Optional[int] = None,
+    ):
+        self.app = app
+        self.minimum_size = settings.compression_minimum_size if minimum_size is None else minimum_size
+        self.offload_bytes = settings.compression_offload_bytes if offload_bytes is None else offload_bytes
+        self.content_types = tuple(content_types or settings.compression_content_types)
+        self.codecs = available_codecs()
+        # Codificações configuradas que estão instaladas, na ordem de preferência
+        self.preference = tuple(e for e in (encodings or settings.compression_encodings) if e in self.codecs)
+        logger.info(f"Compressão de respostas habilitada: {', '.join(self.preference)}")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding, self.preference) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def should_compress(self, status: int, headers: Headers) -> bool:
+        if status < 200 or status in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", ""):
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(self.content_types)
+
+
+class _CompressionResponder:
+    """Estado de compressão de uma única resposta"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Optional[Message] = None
+        self._compressor: Optional[Compressor] = None
+        self._passthrough = False
+        self._bytes_in = COMPRESSION_BYTES.labels(encoding, "in")
+        self._bytes_out = COMPRESSION_BYTES.labels(encoding, "out")
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Os cabeçalhos dependem do primeiro trecho do corpo
+            self._start = message
+            return
+        if message_type != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressor is None:
+            headers = MutableHeaders(raw=self._start["headers"])
+            if not self.middleware.should_compress(self._start["status"], headers) or (
+                not more_body and len(body) < self.middleware.minimum_size
+            ):
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+
+            self._compressor = self.middleware.codecs[self.encoding]()
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Streaming: o tamanho final não é conhecido
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+            else:
+                data = await self._compress(body, final=True)
+                headers["Content-Length"] = str(len(data))
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": data})
+                return
+            await self._send(self._start)
+
+        data = await self._compress(body, final=not more_body)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        if len(data) >= self.middleware.offload_bytes:
+            out = await run_in_threadpool(self._compress_sync, data, final)
+        else:
+            out = self._compress_sync(data, final)
+        self._bytes_in.inc(len(data))
+        self._bytes_out.inc(len(out))
+        return out
+
+    def _compress_sync(self, data: bytes, final: bool) -> bytes:
+        if final:
+            return self._compressor.compress(data) + self._compressor.finish()
+        return self._compressor.compress(data, flush=True)
@@ -0,0 +1,19 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.loop_monitor import LoopMonitor
+from app.middleware.routing import resolve_route
+
+
+class LoopMonitorMiddleware:
+    """Registra a rota de cada requisição para os relatórios de bloqueio do event loop"""
+
+    def __init__(self, app: ASGIApp, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.monitor.running:
+            await self.app(scope, receive, send)
+            return
+
+        with self.monitor.track(f"{scope['method']} {resolve_route(scope)}"):
+            await self.app(scope, receive, send)
@@ -0,0 +1,36 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+from app.middleware.routing import resolve_route
+import time
+
+
+class MetricsMiddleware:
+    """Registra latência por rota/método/status e requisições em andamento"""
+
+    def __init__(self, app: ASGIApp, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        route = resolve_route(scope)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Inclui o tempo de envio do corpo, relevante para respostas em streaming
+            HTTP_REQUEST_DURATION.labels(scope["method"], route, str(status_code)).observe(time.perf_counter() - start)
+            in_flight.dec()
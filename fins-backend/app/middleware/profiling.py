@@ -0,0 +1,143 @@
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.middleware.routing import resolve_route
+import asyncio
+import hmac
+import logging
+import json
+import os
+import re
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-token"
+
+# Log de consultas da requisição em perfilamento (None fora dele)
+_query_log: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("profiler_query_log", default=None)
+
+
+def record_query(context: Any, proceed: Callable[[], Any]) -> Any:
+    """Interceptador que registra as consultas da requisição sendo perfilada"""
+    log = _query_log.get()
+    if log is None:
+        return proceed()
+
+    start = time.perf_counter()
+    entry = {
+        "table": context.table,
+        "operation": context.operation,
+        "query": context.describe(),
+        "started_at": datetime.utcnow().isoformat(),
+    }
+    try:
+        return proceed()
+    except Exception as e:
+        entry["error"] = str(e)
+        raise
+    finally:
+        entry["duration_ms"] = (time.perf_counter() - start) * 1000
+        log.append(entry)
+
+
+class ProfilingMiddleware:
+    """
+    Perfilamento sob demanda de requisições individuais.
+
+    A requisição é perfilada quando traz o cabeçalho X-Profile-Token com o
+    token de administrador configurado (ou sempre, com profiler_always em
+    ambiente local). O perfil é gravado no formato speedscope junto com o
+    log de consultas ao banco em profiler_output_dir. Apenas uma requisição
+    é perfilada por vez em cada worker; as demais seguem sem perfilamento.
+    """
+
+    def __init__(self, app: ASGIApp, output_dir: Optional[str] = None):
+        self.app = app
+        self.output_dir = output_dir or settings.profiler_output_dir
+        self.admin_token = settings.profiler_admin_token.encode("latin-1")
+        self._busy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._busy or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            from pyinstrument import Profiler  # Dependência opcional, usada só sob demanda
+        except ImportError:
+            logger.error("pyinstrument não está instalado; perfilamento ignorado")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        route = resolve_route(scope)
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        queries: List[Dict[str, Any]] = []
+        token = _query_log.set(queries)
+        # async_mode restringe as amostras a esta requisição, ignorando outras tarefas do event loop
+        profiler = Profiler(interval=settings.profiler_interval_seconds, async_mode="enabled")
+        self._busy = True
+        started_at = datetime.utcnow()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            profiler.stop()
+            self._busy = False
+            _query_log.reset(token)
+            meta = {
+                "profile_id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "started_at": started_at.isoformat(),
+                "duration_ms": (datetime.utcnow() - started_at).total_seconds() * 1000,
+            }
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_profile, profiler, meta, queries)
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if settings.profiler_always:
+            return True
+        if not self.admin_token:
+            return False
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER:
+                return hmac.compare_digest(value, self.admin_token)
+        return False
+
+    def _write_profile(self, profiler: Any, meta: Dict[str, Any], queries: List[Dict[str, Any]]) -> None:
+        """Grava o perfil speedscope e o log de consultas da requisição"""
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            slug = re.sub(r"[^a-zA-Z0-9]+", "-", meta["route"]).strip("-") or "root"
+            base = os.path.join(
+                self.output_dir,
+                f"{meta['started_at'][:19].replace(':', '')}-{meta['method']}-{slug}-{meta['profile_id']}",
+            )
+            with open(f"{base}.speedscope.json", "w", encoding="utf-8") as f:
+                f.write(profiler.output(renderer=SpeedscopeRenderer()))
+            with open(f"{base}.queries.json", "w", encoding="utf-8") as f:
+                json.dump({
+                    **meta,
+                    "query_count": len(queries),
+                    "query_time_ms": sum(q["duration_ms"] for q in queries),
+                    "queries": queries,
+                }, f, ensure_ascii=False, indent=2)
+            logger.info(
+                f"Perfil {meta['profile_id']} gravado em {base}.speedscope.json "
+                f"({len(queries)} consultas, {meta['duration_ms']:.0f} ms)"
+            )
+        except Exception as e:
+            logger.error("Erro ao gravar perfil %s: %s", meta["profile_id"], e)
@@ -0,0 +1,238 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.auth.jwt import jwt_manager
+import ipaddress
+import threading
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BucketState:
+    allowed: bool
+    tokens: float
+    retry_after: float
+
+
+class RateLimitBackend:
+    """Interface de armazenamento dos token buckets"""
+
+    def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> BucketState:
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Token buckets em memória, por worker, com número limitado de chaves"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> BucketState:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                # Um bucket descartado volta cheio, o que só favorece o cliente
+                self._buckets.popitem(last=False)
+        retry_after = 0.0 if allowed else (cost - tokens) / refill_rate
+        return BucketState(allowed, tokens, retry_after)
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Token buckets compartilhados entre workers em Redis (atualização atômica via Lua)"""
+
+    SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url: str, prefix: str = "fins:ratelimit:"):
+        import redis  # Dependência opcional, só necessária em deploys multi-worker
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+        self._script = self.client.register_script(self.SCRIPT)
+
+    def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> BucketState:
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[capacity, refill_rate, cost, time.time()])
+        tokens = float(tokens)
+        allowed = bool(int(allowed))
+        retry_after = 0.0 if allowed else (cost - tokens) / refill_rate
+        return BucketState(allowed, tokens, retry_after)
+
+
+def parse_trusted_proxies(entries: Iterable[str]) -> Tuple[bool, List["ipaddress._BaseNetwork"]]:
+    """Converte RATE_LIMIT_TRUSTED_PROXIES em (confia em qualquer proxy, redes confiáveis)"""
+    trust_any = False
+    networks = []
+    for entry in entries:
+        entry = entry.strip()
+        if entry == "*":
+            trust_any = True
+        elif entry:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+    return trust_any, networks
+
+
+def build_rate_limit_backend() -> RateLimitBackend:
+    """Cria o backend configurado, com fallback para memória"""
+    if settings.rate_limit_backend == "redis" and settings.redis_url:
+        try:
+            return RedisRateLimitBackend(settings.redis_url)
+        except Exception as e:
+            logger.error("Erro ao inicializar rate limit em Redis, usando memória local: %s", e)
+    return InMemoryRateLimitBackend()
+
+
+class RateLimitMiddleware:
+    """
+    Rate limiting por token bucket.
+
+    A chave é o usuário do JWT (ou o IP para requisições anônimas) e cada
+    rota consome um custo proporcional ao seu peso, então os endpoints de
+    IA e de senha esgotam o bucket mais rápido que o CRUD. As respostas
+    recebem os cabeçalhos RateLimit-Limit/Remaining/Reset.
+
+    Atrás de um proxy, o IP da conexão é o do proxy: quando ele está em
+    RATE_LIMIT_TRUSTED_PROXIES, o cliente é o último endereço do
+    X-Forwarded-For que não pertence a um proxy confiável.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: Optional[RateLimitBackend] = None,
+        capacity: Optional[float] = None,
+        refill_rate: Optional[float] = None,
+        route_costs: Optional[Dict[str, float]] = None,
+        exempt_paths: Optional[Iterable[str]] = None,
+        trusted_proxies: Optional[Iterable[str]] = None,
+    ):
+        self.app = app
+        self.backend = backend or build_rate_limit_backend()
+        self.capacity = capacity or settings.rate_limit_capacity
+        self.refill_rate = refill_rate or settings.rate_limit_refill_per_second
+        if route_costs is None:
+            # Configurados relativos ao prefixo da API
+            route_costs = {settings.api_v1_str + prefix: cost for prefix, cost in settings.rate_limit_route_costs.items()}
+        # Prefixos mais longos primeiro para que a regra mais específica vença
+        self.route_costs = sorted(route_costs.items(), key=lambda item: len(item[0]), reverse=True)
+        self.exempt_paths = set(exempt_paths if exempt_paths is not None else settings.rate_limit_exempt_paths)
+        self.trust_any_proxy, self.trusted_networks = parse_trusted_proxies(
+            trusted_proxies if trusted_proxies is not None else settings.rate_limit_trusted_proxies
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        cost = self._route_cost(scope["path"])
+        try:
+            state = self.backend.consume(self._identity(scope), cost, self.capacity, self.refill_rate)
+        except Exception as e:
+            # Falha do backend não pode derrubar a API: deixa a requisição passar
+            logger.warning("Erro no backend de rate limit: %s", e)
+            await self.app(scope, receive, send)
+            return
+
+        headers = self._headers(state)
+        if not state.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(state.retry_after)))
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Limite de requisições excedido"},
+                headers=headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        raw_headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + raw_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def _route_cost(self, path: str) -> float:
+        for prefix, cost in self.route_costs:
+            if path.startswith(prefix):
+                return cost
+        return 1.0
+
+    def _identity(self, scope: Scope) -> str:
+        """Identifica o cliente pelo usuário do JWT ou, sem token válido, pelo IP"""
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    payload = jwt_manager.verify_token(token)
+                    if payload and payload.get("sub"):
+                        return f"user:{payload['sub']}"
+                break
+        return f"ip:{self._client_ip(scope)}"
+
+    def _is_trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_networks)
+
+    def _client_ip(self, scope: Scope) -> str:
+        """IP do cliente, seguindo o X-Forwarded-For apenas a partir de proxies confiáveis"""
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if not (self.trust_any_proxy or self._is_trusted(peer)):
+            return peer
+        forwarded = [
+            value.decode("latin-1")
+            for name, value in scope.get("headers", [])
+            if name == b"x-forwarded-for"
+        ]
+        hops = [hop.strip() for value in forwarded for hop in value.split(",") if hop.strip()]
+        # Da direita para a esquerda: os endereços à esquerda podem ter sido forjados pelo cliente
+        for hop in reversed(hops):
+            if not self._is_trusted(hop):
+                return hop
+        return hops[0] if hops else peer
+
+    def _headers(self, state: BucketState) -> Dict[str, str]:
+        reset = (self.capacity - state.tokens) / self.refill_rate
+        return {
+            "RateLimit-Limit": str(int(self.capacity)),
+            "RateLimit-Remaining": str(max(0, int(state.tokens))),
+            "RateLimit-Reset": str(max(0, math.ceil(reset))),
+        }
@@ -0,0 +1,37 @@
+from collections import OrderedDict
+from starlette.routing import Match
+from starlette.types import Scope
+import threading
+
+_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 4096
+
+
+def resolve_route(scope: Scope) -> str:
+    """
+    Retorna o template da rota (ex.: /api/v1/financial/expenses/{expense_id}).
+
+    Usado como rótulo de métricas e nome de spans: o path bruto tem IDs e
+    geraria cardinalidade ilimitada. Rotas inexistentes viram "unmatched".
+    """
+    key = (scope.get("method"), scope["path"])
+    with _cache_lock:
+        route = _cache.get(key)
+        if route is not None:
+            _cache.move_to_end(key)
+            return route
+
+    route = "unmatched"
+    router = getattr(scope.get("app"), "router", None)
+    for candidate in getattr(router, "routes", []):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            route = getattr(candidate, "path", scope["path"])
+            break
+
+    with _cache_lock:
+        _cache[key] = route
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return route
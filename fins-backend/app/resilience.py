@@ -0,0 +1,222 @@
+from typing import Any, Callable, Dict, Optional
+from postgrest.exceptions import APIError
+from app.config import settings
+from app.metrics import DB_CIRCUIT_STATE, DB_CIRCUIT_TRANSITIONS, DB_QUERY_REJECTED, DB_QUERY_RETRIES
+import threading
+import logging
+import asyncio
+import random
+import httpx
+import time
+
+logger = logging.getLogger(__name__)
+
+# Códigos do PostgREST/Postgres que indicam falha passageira do banco, e não
+# da consulta: conexão ou pool indisponível, timeout de statement, conflitos
+# de serialização e respostas 5xx do gateway sem corpo JSON
+_TRANSIENT_CODES = {
+    "PGRST000", "PGRST001", "PGRST002", "PGRST003",
+    "40001", "40P01", "53300", "57014", "57P01", "57P03",
+    "500", "502", "503", "504",
+}
+
+# Operações que podem ser repetidas sem efeito colateral
+_IDEMPOTENT_OPERATIONS = {"select"}
+
+
+class DatabaseUnavailableError(Exception):
+    """Banco indisponível (circuito aberto ou falhas passageiras esgotaram as tentativas)"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_transient(error: BaseException) -> bool:
+    """Indica se a falha é do banco/rede (conta para o circuit breaker) e não da consulta"""
+    if isinstance(error, httpx.TransportError):
+        # Timeouts de conexão e leitura, conexões recusadas ou interrompidas
+        return True
+    if isinstance(error, APIError):
+        return str(error.code or "") in _TRANSIENT_CODES or str(error.code or "").startswith("08")
+    return False
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um cliente do banco.
+
+    Fechado, deixa tudo passar e conta as falhas passageiras consecutivas. Ao
+    atingir `failure_threshold`, abre: as consultas falham imediatamente, sem
+    ocupar o worker esperando o timeout. Depois de `recovery_seconds` fica
+    meio-aberto e libera `half_open_max_calls` consultas de teste; um sucesso
+    fecha o circuito e uma falha o reabre.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 30.0, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        DB_CIRCUIT_STATE.labels(name).set(0)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def retry_after(self) -> float:
+        """Segundos até o circuito aceitar uma nova tentativa"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.recovery_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """Reserva a execução de uma consulta; False se o circuito estiver aberto"""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._state == self.HALF_OPEN:
+                self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._failures += 1
+            if self._state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._open()
+
+    def _refresh(self, now: float) -> None:
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_seconds:
+            self._probes = 0
+            self._transition(self.HALF_OPEN)
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._transition(self.OPEN)
+
+    def _transition(self, state: str) -> None:
+        previous, self._state = self._state, state
+        DB_CIRCUIT_STATE.labels(self.name).set(self._STATE_VALUES[state])
+        DB_CIRCUIT_TRANSITIONS.labels(self.name, state).inc()
+        if state == self.OPEN:
+            logger.error("Circuito do banco '%s' aberto após falhas consecutivas (%s -> open)", self.name, previous)
+        else:
+            logger.warning("Circuito do banco '%s': %s -> %s", self.name, previous, state)
+
+
+def _on_event_loop() -> bool:
+    """Indica se a thread atual executa um event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _backoff(attempt: int) -> float:
+    """Backoff exponencial com jitter completo"""
+    ceiling = min(settings.db_retry_max_backoff_seconds, settings.db_retry_base_backoff_seconds * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def resilient_query(context: Any, proceed: Callable[[], Any], breaker: Optional[CircuitBreaker] = None) -> Any:
+    """
+    Interceptador de consultas com circuit breaker e retentativas.
+
+    Leituras (select) que falham por motivo passageiro são repetidas até
+    DB_RETRY_ATTEMPTS vezes, com backoff exponencial e jitter, enquanto
+    couberem em DB_RETRY_DEADLINE_SECONDS; escritas nunca são repetidas.
+    Erros da própria consulta (coluna inexistente, violação de constraint)
+    são repassados sem contar como falha do banco. Falhas passageiras
+    esgotadas e consultas recusadas pelo circuito aberto viram
+    DatabaseUnavailableError, que a API responde com 503.
+
+    O cliente do banco é síncrono e o backoff ocupa a thread que executa a
+    consulta. Por isso só há retentativas fora do event loop (executores,
+    streams de exportação); no loop, dormir pararia todas as requisições do
+    worker, então a falha vira 503 na hora e o cliente repete a chamada
+    seguindo o Retry-After.
+    """
+    breaker = breaker or get_breaker(getattr(context, "client", "primary"))
+    retryable = context.operation in _IDEMPOTENT_OPERATIONS and not _on_event_loop()
+    attempts = settings.db_retry_attempts if retryable else 1
+    deadline = time.monotonic() + settings.db_retry_deadline_seconds
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            DB_QUERY_REJECTED.labels(context.table, context.operation).inc()
+            raise DatabaseUnavailableError(
+                f"Banco indisponível (circuito '{breaker.name}' aberto)",
+                retry_after=breaker.retry_after(),
+            )
+        try:
+            result = proceed()
+        except Exception as e:
+            if not is_transient(e):
+                # O banco respondeu: a falha é da consulta
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            attempt += 1
+            delay = _backoff(attempt)
+            if attempt >= attempts or time.monotonic() + delay > deadline or breaker.state == CircuitBreaker.OPEN:
+                raise DatabaseUnavailableError(
+                    f"Falha no banco em {context.operation} {context.table}: {e}",
+                    retry_after=breaker.retry_after(),
+                ) from e
+            DB_QUERY_RETRIES.labels(context.table, context.operation).inc()
+            logger.warning("Falha passageira em %s %s, nova tentativa em %.3fs: %s", context.operation, context.table, delay, e)
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+# Um circuit breaker por cliente do banco ("primary" e, se configurada, "replica")
+breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(client: str) -> CircuitBreaker:
+    """Circuit breaker do cliente, criado no primeiro uso"""
+    breaker = breakers.get(client)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = breakers.get(client)
+            if breaker is None:
+                breaker = breakers[client] = CircuitBreaker(
+                    client,
+                    failure_threshold=settings.db_circuit_failure_threshold,
+                    recovery_seconds=settings.db_circuit_recovery_seconds,
+                    half_open_max_calls=settings.db_circuit_half_open_max_calls,
+                )
+    return breaker
+
+
+# Criado na importação para aparecer em /health e nas métricas desde o início
+db_breaker = get_breaker("primary")
@@ -0,0 +1,39 @@
+from decimal import Decimal
+from typing import Any
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from app.tracing import start_span
+import orjson
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Converte tipos que o orjson não serializa nativamente"""
+    if isinstance(obj, BaseModel):
+        # Os valores dos campos já estão em tipos nativos; modelos aninhados
+        # voltam para esta função recursivamente. Só os campos declarados:
+        # model_construct guarda também as colunas extras do select("*"), que
+        # o response_model filtraria
+        values = obj.__dict__
+        return {name: values[name] for name in type(obj).model_fields if name in values}
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    Resposta JSON serializada com orjson.
+
+    Retornar esta resposta diretamente do endpoint faz o FastAPI pular a
+    revalidação contra o response_model (que continua valendo para a
+    documentação OpenAPI), então ela deve ser usada apenas com modelos
+    construídos a partir de dados confiáveis.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with start_span("response.serialize"):
+            return orjson.dumps(
+                content,
+                default=_orjson_default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+            )
@@ -8,6 +8,10 @@ from app.models.ai_models import (
     ExpenseAnalysis, FinancialInsights, RiskLevel
 )
 from app.models.user import ExpenseCategory
+from app.identity_map import IdentityMap
+from app.metrics import AI_MODEL_FIT_DURATION, track_analysis
+from app.tracing import start_span, traced
+from app.resilience import DatabaseUnavailableError
 import logging
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
@@ -17,16 +21,24 @@ import xgboost as xgb
 from prophet import Prophet
 import json
 import pickle
+import copy
 import os
 
 logger = logging.getLogger(__name__)
 
 class AIService:
-    def __init__(self, db: Client):
+    def __init__(self, db: Client, identity_map: Optional[IdentityMap] = None):
         self.db = db
+        self.identity_map = identity_map
         self.models_path = "./models/"
         self._ensure_models_directory()
         self.scaler = StandardScaler()
+    
+    def scoped(self, identity_map: Optional[IdentityMap]) -> "AIService":
+        """Cópia leve do serviço de longa duração ligada ao mapa de identidade da requisição"""
+        service = copy.copy(self)
+        service.identity_map = identity_map
+        return service
         
     def _ensure_models_directory(self):
         """Garante que o diretório de modelos existe"""
@@ -35,14 +47,33 @@ class AIService:
     
     async def get_user_financial_data(self, user_id: str, months: int = 12) -> pd.DataFrame:
         """Coleta dados financeiros do usuário para análise"""
+        # As análises de uma mesma requisição (ex.: insights) compartilham o
+        # mesmo DataFrame em vez de repetir as consultas
+        if self.identity_map is not None:
+            return await self.identity_map.memo(
+                ("financial_data", user_id, months),
+                lambda: self._load_user_financial_data(user_id, months)
+            )
+        return await self._load_user_financial_data(user_id, months)
+    
+    async def _get_financial_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Busca o perfil financeiro, via mapa de identidade quando disponível"""
+        if self.identity_map is not None:
+            return await self.identity_map.load("financial_profiles", "user_id", user_id)
+        
+        result = self.db.table("financial_profiles").select("*").eq("user_id", user_id).execute()
+        return result.data[0] if result.data else None
+    
+    @track_analysis("load_financial_data")
+    @traced("ai.load_financial_data")
+    async def _load_user_financial_data(self, user_id: str, months: int) -> pd.DataFrame:
+        """Consulta perfil, despesas e recibos e monta o DataFrame de análise"""
         try:
             # Busca perfil financeiro
-            profile_result = self.db.table("financial_profiles").select("*").eq("user_id", user_id).execute()
-            if not profile_result.data:
+            profile = await self._get_financial_profile(user_id)
+            if not profile:
                 return pd.DataFrame()
             
-            profile = profile_result.data[0]
-            
             # Busca despesas dos últimos meses
             start_date = datetime.utcnow() - timedelta(days=months * 30)
             expenses_result = self.db.table("expenses").select("*").eq("user_id", user_id).gte("date", start_date.isoformat()).execute()
@@ -85,10 +116,14 @@ class AIService:
             
             return df
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao coletar dados financeiros: {e}")
+            logger.error("Erro ao coletar dados financeiros: %s", e)
             return pd.DataFrame()
     
+    @track_analysis("predict_balance")
+    @traced("ai.predict_balance")
     async def predict_balance(self, user_id: str, months_ahead: int = 3) -> BalancePrediction:
         """Previsão do saldo futuro usando Prophet"""
         try:
@@ -108,7 +143,8 @@ class AIService:
                 daily_seasonality=False,
                 changepoint_prior_scale=0.05
             )
-            model.fit(prophet_df)
+            with AI_MODEL_FIT_DURATION.labels("prophet").time(), start_span("ai.model_fit", model="prophet", rows=len(prophet_df)):
+                model.fit(prophet_df)
             
             # Faz previsão
             future_dates = model.make_future_dataframe(periods=months_ahead * 30)
@@ -135,9 +171,11 @@ class AIService:
             )
             
         except Exception as e:
-            logger.error(f"Erro na previsão de saldo: {e}")
+            logger.error("Erro na previsão de saldo: %s", e)
             raise
     
+    @track_analysis("predict_savings")
+    @traced("ai.predict_savings")
     async def predict_savings(self, user_id: str) -> SavingsPrediction:
         """Previsão da capacidade de poupança"""
         try:
@@ -156,9 +194,9 @@ class AIService:
             annual_savings_potential = monthly_savings_potential * 12
             
             # Calcula taxa de poupança
-            profile_result = self.db.table("financial_profiles").select("salary").eq("user_id", user_id).execute()
-            if profile_result.data:
-                salary = profile_result.data[0]['salary']
+            profile = await self._get_financial_profile(user_id)
+            if profile:
+                salary = profile['salary']
                 savings_rate = monthly_savings_potential / salary if salary > 0 else 0
             else:
                 savings_rate = 0
@@ -180,9 +218,11 @@ class AIService:
             )
             
         except Exception as e:
-            logger.error(f"Erro na previsão de poupança: {e}")
+            logger.error("Erro na previsão de poupança: %s", e)
             raise
     
+    @track_analysis("analyze_risk")
+    @traced("ai.analyze_risk")
     async def analyze_risk(self, user_id: str) -> RiskAnalysis:
         """Análise de risco de inadimplência"""
         try:
@@ -217,9 +257,11 @@ class AIService:
             )
             
         except Exception as e:
-            logger.error(f"Erro na análise de risco: {e}")
+            logger.error("Erro na análise de risco: %s", e)
             raise
     
+    @track_analysis("analyze_expenses")
+    @traced("ai.analyze_expenses")
     async def analyze_expenses(self, user_id: str) -> ExpenseAnalysis:
         """Análise detalhada de despesas"""
         try:
@@ -265,9 +307,11 @@ class AIService:
             )
             
         except Exception as e:
-            logger.error(f"Erro na análise de despesas: {e}")
+            logger.error("Erro na análise de despesas: %s", e)
             raise
     
+    @track_analysis("generate_financial_insights")
+    @traced("ai.generate_financial_insights")
     async def generate_financial_insights(self, user_id: str) -> FinancialInsights:
         """Gera insights financeiros completos"""
         try:
@@ -304,7 +348,7 @@ class AIService:
             )
             
         except Exception as e:
-            logger.error(f"Erro ao gerar insights financeiros: {e}")
+            logger.error("Erro ao gerar insights financeiros: %s", e)
             raise
     
     def _calculate_risk_features(self, df: pd.DataFrame) -> Dict[str, float]:
@@ -0,0 +1,186 @@
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional
+from supabase import Client
+from app.config import settings
+from app.database import after_key
+import logging
+import csv
+import io
+import json
+import orjson
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional, necessário apenas para Parquet
+    pa = None
+    pq = None
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+# Colunas comuns a todos os registros exportados (perfil, despesas e recibos)
+EXPORT_COLUMNS = [
+    "record_type", "id", "date", "amount", "category", "description",
+    "salary", "current_balance", "monthly_expenses", "created_at", "updated_at",
+]
+
+_NUMERIC_COLUMNS = {"amount", "salary", "current_balance"}
+
+
+class _StreamSink:
+    """Destino de escrita que acumula bytes para serem enviados em partes"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ExportService:
+    def __init__(self, db: Client, chunk_size: Optional[int] = None):
+        self.db = db
+        self.chunk_size = chunk_size or settings.export_chunk_size
+
+    @staticmethod
+    def is_format_available(export_format: ExportFormat) -> bool:
+        """Indica se o formato pode ser gerado neste ambiente"""
+        return export_format != ExportFormat.PARQUET or pq is not None
+
+    def stream(self, user_id: str, export_format: ExportFormat) -> Iterator[bytes]:
+        """
+        Gera a exportação completa do usuário em partes.
+
+        O gerador é síncrono de propósito: o StreamingResponse o consome em
+        uma thread, então as consultas paginadas não bloqueiam o event loop.
+        """
+        writers = {
+            ExportFormat.CSV: self._stream_csv,
+            ExportFormat.NDJSON: self._stream_ndjson,
+            ExportFormat.PARQUET: self._stream_parquet,
+        }
+        try:
+            yield from writers[export_format](self.iter_record_chunks(user_id))
+        except Exception as e:
+            # Os cabeçalhos já foram enviados, então só resta interromper o stream
+            logger.error("Erro ao exportar dados do usuário %s: %s", user_id, e)
+            raise
+
+    def iter_record_chunks(self, user_id: str) -> Iterator[List[Dict[str, Any]]]:
+        """Percorre perfil, despesas e recibos do usuário em blocos"""
+        profile_result = self.db.table("financial_profiles").select("*").eq("user_id", user_id).execute()
+        if profile_result.data:
+            yield [self._to_record("profile", profile_result.data[0])]
+
+        for table, record_type in (("expenses", "expense"), ("receipts", "receipt")):
+            for rows in self._iter_table(table, user_id):
+                yield [self._to_record(record_type, row) for row in rows]
+
+    def _iter_table(self, table: str, user_id: str) -> Iterator[List[Dict[str, Any]]]:
+        """Pagina uma tabela do usuário por keyset em ordem estável (date, id)"""
+        last: Optional[Dict[str, Any]] = None
+        while True:
+            query = self.db.table(table).select("*").eq("user_id", user_id)
+            if last is not None:
+                # Continua depois da última linha lida, pelo índice (user_id, date)
+                query = after_key(query, "date", last["date"], last["id"])
+            result = query.order("date").order("id").limit(self.chunk_size).execute()
+            rows = result.data or []
+            if rows:
+                yield rows
+            if len(rows) < self.chunk_size:
+                return
+            last = rows[-1]
+
+    @staticmethod
+    def _to_record(record_type: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        record = {column: row.get(column) for column in EXPORT_COLUMNS}
+        record["record_type"] = record_type
+        if record_type == "profile" and isinstance(record["monthly_expenses"], str):
+            # Perfis antigos gravaram monthly_expenses como string JSON
+            record["monthly_expenses"] = json.loads(record["monthly_expenses"])
+        return record
+
+    def _stream_csv(self, chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        # Enviado antes dos dados: um usuário sem registros ainda recebe o cabeçalho
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        for records in chunks:
+            for record in records:
+                if record["monthly_expenses"] is not None:
+                    record["monthly_expenses"] = json.dumps(record["monthly_expenses"], ensure_ascii=False)
+                writer.writerow(record)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    def _stream_ndjson(self, chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+        for records in chunks:
+            yield b"".join(orjson.dumps(record) + b"\n" for record in records)
+
+    def _stream_parquet(self, chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+        schema = pa.schema([
+            (column, pa.float64() if column in _NUMERIC_COLUMNS else pa.string())
+            for column in EXPORT_COLUMNS
+        ])
+        sink = _StreamSink()
+        # Cada bloco vira um row group, enviado assim que é escrito
+        with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+            for records in chunks:
+                columns = {column: [] for column in EXPORT_COLUMNS}
+                for record in records:
+                    for column in EXPORT_COLUMNS:
+                        value = record[column]
+                        if column == "monthly_expenses" and value is not None:
+                            value = json.dumps(value, ensure_ascii=False)
+                        columns[column].append(value)
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                data = sink.drain()
+                if data:
+                    yield data
+        # O rodapé do arquivo é escrito ao fechar o writer
+        data = sink.drain()
+        if data:
+            yield data
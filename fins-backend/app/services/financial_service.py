@@ -1,17 +1,89 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from supabase import Client
 from app.models.user import FinancialProfile, FinancialProfileCreate, FinancialProfileUpdate, Expense, ExpenseCreate, ExpenseUpdate, Receipt, ReceiptCreate, ReceiptUpdate
+from app.cache import profile_cache
+from app.identity_map import IdentityMap
+from app.conditional import VERSIONED_TABLES
+from app.config import settings
+from app.database import after_key
+from app.events import event_bus
+from app.resilience import DatabaseUnavailableError
+from dateutil.parser import isoparse
 from fastapi import HTTPException, status
+from postgrest.exceptions import APIError
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import base64
+import time
 import uuid
 import json
+import copy
 
 logger = logging.getLogger(__name__)
 
+# Código do PostgREST para função inexistente (migração 0002 não aplicada ou banco em memória)
+_FUNCTION_NOT_FOUND = "PGRST202"
+# Sem a função, a próxima tentativa de usá-la só ocorre após este intervalo
+# (a migração pode ser aplicada com o worker no ar, e o cache de schema do
+# PostgREST pode falhar momentaneamente)
+_VERSION_RPC_REPROBE_SECONDS = 300.0
+
+# Tabelas incluídas na sincronização incremental e o modelo de cada linha
+SYNC_TABLES = (("expenses", Expense), ("receipts", Receipt))
+
+
+class InvalidSyncCursorError(ValueError):
+    """Cursor de sincronização malformado"""
+
+
+def _to_utc(value: str) -> datetime:
+    """Converte um timestamp do banco em datetime UTC sem fuso"""
+    parsed = isoparse(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _to_db_timestamp(value: datetime) -> str:
+    return value.isoformat(timespec="microseconds") + "+00:00"
+
+
+def encode_sync_cursor(position: datetime, issued_at: datetime, keys: Optional[Dict[str, List[str]]] = None) -> str:
+    """
+    Cursor opaco: posição nos dados (updated_at), momento em que foi emitido e,
+    durante a paginação, a última chave (timestamp, id) lida de cada tabela
+    """
+    payload: Dict[str, Any] = {"ts": position.isoformat(), "at": issued_at.isoformat()}
+    if keys:
+        payload["keys"] = keys
+    payload_json = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload_json.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> Tuple[datetime, datetime, Dict[str, List[str]]]:
+    """Decodifica um cursor de encode_sync_cursor"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        keys = {table: [str(key[0]), str(key[1])] for table, key in payload.get("keys", {}).items()}
+        return datetime.fromisoformat(payload["ts"]), datetime.fromisoformat(payload["at"]), keys
+    except Exception as e:
+        raise InvalidSyncCursorError("Cursor de sincronização inválido") from e
+
+
 class FinancialService:
-    def __init__(self, db: Client):
+    # Compartilhado entre as instâncias: quando a função não existe, as versões
+    # são calculadas por tabela até este instante (time.monotonic())
+    _version_rpc_retry_at = 0.0
+    
+    def __init__(self, db: Client, identity_map: Optional[IdentityMap] = None):
         self.db = db
+        self.identity_map = identity_map
+    
+    def scoped(self, identity_map: Optional[IdentityMap]) -> "FinancialService":
+        """Cópia leve do serviço de longa duração ligada ao mapa de identidade da requisição"""
+        service = copy.copy(self)
+        service.identity_map = identity_map
+        return service
     
     # Financial Profile Methods
     async def create_financial_profile(self, profile_data: FinancialProfileCreate) -> FinancialProfile:
@@ -22,10 +94,6 @@ class FinancialService:
             profile_dict["created_at"] = datetime.utcnow().isoformat()
             profile_dict["updated_at"] = datetime.utcnow().isoformat()
             
-            # Converte monthly_expenses para JSON
-            if profile_dict.get("monthly_expenses"):
-                profile_dict["monthly_expenses"] = json.dumps(profile_dict["monthly_expenses"])
-            
             result = self.db.table("financial_profiles").insert(profile_dict).execute()
             
             if not result.data:
@@ -34,37 +102,48 @@ class FinancialService:
                     detail="Erro ao criar perfil financeiro"
                 )
             
-            created_profile = result.data[0]
-            # Converte JSON de volta para dict
-            if created_profile.get("monthly_expenses"):
-                created_profile["monthly_expenses"] = json.loads(created_profile["monthly_expenses"])
-            
+            created_profile = self._cache_profile(result.data[0])
+            self._remember("financial_profiles", "user_id", created_profile)
+            event_bus.publish(created_profile["user_id"], "profile.updated", profile=created_profile)
             return FinancialProfile(**created_profile)
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao criar perfil financeiro: {e}")
+            logger.error("Erro ao criar perfil financeiro: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Erro interno do servidor"
             )
     
-    async def get_financial_profile(self, user_id: str) -> Optional[FinancialProfile]:
-        """Busca perfil financeiro do usuário"""
+    async def get_financial_profile(self, user_id: str, use_cache: bool = True, allow_stale: bool = True) -> Optional[FinancialProfile]:
+        """Busca perfil financeiro do usuário (o último perfil conhecido, com allow_stale, se o banco estiver indisponível)"""
         try:
-            result = self.db.table("financial_profiles").select("*").eq("user_id", user_id).execute()
+            # Perfil já lido nesta requisição dispensa cache e banco
+            if self.identity_map is not None and self.identity_map.contains("financial_profiles", "user_id", user_id):
+                profile = self.identity_map.peek("financial_profiles", "user_id", user_id)
+                return FinancialProfile(**profile) if profile else None
             
-            if not result.data:
-                return None
+            if use_cache:
+                cached_profile = profile_cache.get(user_id)
+                if cached_profile is not None:
+                    return FinancialProfile(**cached_profile)
             
-            profile = result.data[0]
-            # Converte JSON de volta para dict
-            if profile.get("monthly_expenses"):
-                profile["monthly_expenses"] = json.loads(profile["monthly_expenses"])
+            profile = await self._fetch_one("financial_profiles", "user_id", user_id)
+            if not profile:
+                return None
             
+            profile = self._cache_profile(profile)
             return FinancialProfile(**profile)
             
+        except DatabaseUnavailableError:
+            stale_profile = profile_cache.get_stale(user_id) if allow_stale else None
+            if stale_profile is None:
+                raise
+            logger.warning("Banco indisponível; perfil financeiro servido do cache expirado")
+            return FinancialProfile(**stale_profile)
         except Exception as e:
-            logger.error(f"Erro ao buscar perfil financeiro: {e}")
+            logger.error("Erro ao buscar perfil financeiro: %s", e)
             return None
     
     async def update_financial_profile(self, user_id: str, profile_data: FinancialProfileUpdate) -> Optional[FinancialProfile]:
@@ -73,24 +152,23 @@ class FinancialService:
             update_data = profile_data.dict(exclude_unset=True)
             update_data["updated_at"] = datetime.utcnow().isoformat()
             
-            # Converte monthly_expenses para JSON se existir
-            if update_data.get("monthly_expenses"):
-                update_data["monthly_expenses"] = json.dumps(update_data["monthly_expenses"])
-            
             result = self.db.table("financial_profiles").update(update_data).eq("user_id", user_id).execute()
             
             if not result.data:
+                profile_cache.delete(user_id)
                 return None
             
-            profile = result.data[0]
-            # Converte JSON de volta para dict
-            if profile.get("monthly_expenses"):
-                profile["monthly_expenses"] = json.loads(profile["monthly_expenses"])
-            
+            profile = self._cache_profile(result.data[0])
+            self._remember("financial_profiles", "user_id", profile)
+            event_bus.publish(user_id, "profile.updated", profile=profile)
             return FinancialProfile(**profile)
             
+        except DatabaseUnavailableError:
+            profile_cache.delete(user_id)
+            raise
         except Exception as e:
-            logger.error(f"Erro ao atualizar perfil financeiro: {e}")
+            profile_cache.delete(user_id)
+            logger.error("Erro ao atualizar perfil financeiro: %s", e)
             return None
     
     # Expense Methods
@@ -111,13 +189,19 @@ class FinancialService:
                     detail="Erro ao criar despesa"
                 )
             
+            self._remember("expenses", "id", result.data[0])
+            event_bus.publish(expense_data.user_id, "transaction.created", kind="expense", transaction=result.data[0])
+            
             # Atualiza o saldo do usuário
             await self._update_user_balance(expense_data.user_id, -expense_data.amount)
+            await self._check_budget(expense_data.user_id, result.data[0])
             
             return Expense(**result.data[0])
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao criar despesa: {e}")
+            logger.error("Erro ao criar despesa: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Erro interno do servidor"
@@ -128,10 +212,13 @@ class FinancialService:
         try:
             result = self.db.table("expenses").select("*").eq("user_id", user_id).order("date", desc=True).range(skip, skip + limit).execute()
             
-            return [Expense(**expense) for expense in result.data]
+            # Linhas vindas do banco já estão no formato do modelo, sem revalidação
+            return [Expense.model_construct(**expense) for expense in result.data]
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao listar despesas: {e}")
+            logger.error("Erro ao listar despesas: %s", e)
             return []
     
     async def update_expense(self, expense_id: str, user_id: str, expense_data: ExpenseUpdate) -> Optional[Expense]:
@@ -150,6 +237,9 @@ class FinancialService:
             if not result.data:
                 return None
             
+            self._remember("expenses", "id", result.data[0])
+            event_bus.publish(user_id, "transaction.updated", kind="expense", transaction=result.data[0])
+            
             # Atualiza o saldo se o valor mudou
             if "amount" in update_data:
                 amount_diff = current_expense.amount - update_data["amount"]
@@ -157,8 +247,10 @@ class FinancialService:
             
             return Expense(**result.data[0])
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao atualizar despesa: {e}")
+            logger.error("Erro ao atualizar despesa: %s", e)
             return None
     
     async def delete_expense(self, expense_id: str, user_id: str) -> bool:
@@ -172,14 +264,23 @@ class FinancialService:
             result = self.db.table("expenses").delete().eq("id", expense_id).eq("user_id", user_id).execute()
             
             if result.data:
+                if self.identity_map is not None:
+                    self.identity_map.evict("expenses", "id", expense_id)
+                
+                # A exclusão é definitiva; o registro permite que /sync a propague
+                self._record_deletion("expenses", user_id, expense_id)
+                event_bus.publish(user_id, "transaction.deleted", kind="expense", id=expense_id)
+                
                 # Atualiza o saldo (adiciona o valor de volta)
                 await self._update_user_balance(user_id, current_expense.amount)
                 return True
             
             return False
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao deletar despesa: {e}")
+            logger.error("Erro ao deletar despesa: %s", e)
             return False
     
     # Receipt Methods
@@ -200,13 +301,17 @@ class FinancialService:
                     detail="Erro ao criar recibo"
                 )
             
+            event_bus.publish(receipt_data.user_id, "transaction.created", kind="receipt", transaction=result.data[0])
+            
             # Atualiza o saldo do usuário
             await self._update_user_balance(receipt_data.user_id, receipt_data.amount)
             
             return Receipt(**result.data[0])
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao criar recibo: {e}")
+            logger.error("Erro ao criar recibo: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Erro interno do servidor"
@@ -217,18 +322,22 @@ class FinancialService:
         try:
             result = self.db.table("receipts").select("*").eq("user_id", user_id).order("date", desc=True).range(skip, skip + limit).execute()
             
-            return [Receipt(**receipt) for receipt in result.data]
+            return [Receipt.model_construct(**receipt) for receipt in result.data]
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao listar recibos: {e}")
+            logger.error("Erro ao listar recibos: %s", e)
             return []
     
     # Helper Methods
     async def _update_user_balance(self, user_id: str, amount_change: float) -> bool:
         """Atualiza o saldo do usuário"""
         try:
-            # Busca o perfil financeiro atual
-            profile = await self.get_financial_profile(user_id)
+            # Busca o perfil financeiro atual. Com cache apenas local, outro worker
+            # pode ter alterado o saldo, então a leitura vai direto ao banco
+            # O saldo novo é gravado a partir deste, então nunca de um perfil expirado
+            profile = await self.get_financial_profile(user_id, use_cache=profile_cache.is_shared, allow_stale=False)
             if not profile:
                 return False
             
@@ -239,26 +348,242 @@ class FinancialService:
                 "updated_at": datetime.utcnow().isoformat()
             }).eq("user_id", user_id).execute()
             
-            return len(result.data) > 0
+            if not result.data:
+                profile_cache.delete(user_id)
+                return False
+            
+            self._cache_profile(result.data[0])
+            self._remember("financial_profiles", "user_id", result.data[0])
+            event_bus.publish(user_id, "balance.changed", balance=new_balance, delta=amount_change)
+            return True
             
         except Exception as e:
-            logger.error(f"Erro ao atualizar saldo: {e}")
+            profile_cache.delete(user_id)
+            logger.error("Erro ao atualizar saldo: %s", e)
             return False
     
+    async def _check_budget(self, user_id: str, expense: Dict[str, Any]) -> None:
+        """Publica budget.warning/exceeded quando a despesa cruza o orçamento mensal da categoria"""
+        try:
+            profile = await self.get_financial_profile(user_id)
+            budget = (profile.monthly_expenses or {}).get(expense["category"]) if profile else None
+            if not budget:
+                return
+            
+            month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            if _to_utc(expense["date"]) < month_start:
+                return
+            
+            # Atendido por index-only scan em (user_id, category, date) INCLUDE (amount)
+            result = (
+                self.db.table("expenses")
+                .select("amount")
+                .eq("user_id", user_id)
+                .eq("category", expense["category"])
+                .gte("date", _to_db_timestamp(month_start))
+                .execute()
+            )
+            spent = sum(row["amount"] for row in result.data or [])
+            before = spent - expense["amount"]
+            for event_type, threshold in (("budget.exceeded", budget), ("budget.warning", budget * settings.budget_warning_ratio)):
+                if before < threshold <= spent:
+                    event_bus.publish(
+                        user_id, event_type,
+                        category=expense["category"], budget=budget, spent=spent,
+                    )
+                    break
+            
+        except Exception as e:
+            logger.error("Erro ao verificar orçamento: %s", e)
+    
+    async def _fetch_one(self, table: str, column: str, value: str) -> Optional[Dict[str, Any]]:
+        """Busca uma linha por coluna única, via mapa de identidade quando disponível"""
+        if self.identity_map is not None:
+            return await self.identity_map.load(table, column, value)
+        
+        result = self.db.table(table).select("*").eq(column, value).execute()
+        return result.data[0] if result.data else None
+    
+    def _remember(self, table: str, column: str, row: Dict[str, Any]) -> None:
+        """Registra no mapa de identidade uma linha retornada por uma escrita"""
+        if self.identity_map is not None:
+            self.identity_map.put(table, column, row)
+    
+    def _cache_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Normaliza a linha do perfil e atualiza o cache de perfis"""
+        # monthly_expenses é JSONB nativo; perfis antigos ainda podem ter
+        # sido gravados como string JSON (ver scripts/migrate_monthly_expenses_jsonb.sql)
+        if isinstance(profile.get("monthly_expenses"), str):
+            profile["monthly_expenses"] = json.loads(profile["monthly_expenses"])
+        
+        profile_cache.set(profile["user_id"], profile)
+        return profile
+    
     async def _get_expense_by_id(self, expense_id: str) -> Optional[Expense]:
         """Busca despesa por ID"""
         try:
-            result = self.db.table("expenses").select("*").eq("id", expense_id).execute()
+            expense = await self._fetch_one("expenses", "id", expense_id)
             
-            if not result.data:
+            if not expense:
                 return None
             
-            return Expense(**result.data[0])
+            return Expense(**expense)
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao buscar despesa por ID: {e}")
+            logger.error("Erro ao buscar despesa por ID: %s", e)
             return None
     
+    # Sync Methods
+    async def get_changes(self, user_id: str, cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Linhas criadas, alteradas ou excluídas desde o cursor.
+        
+        Sem cursor (ou com um cursor emitido antes do período de retenção das
+        exclusões), retorna todos os dados com reset=True e o cliente deve
+        substituir sua cópia local. Cada tabela é lida por faixa de updated_at
+        no índice (user_id, updated_at), limitada a `limit` linhas; com
+        has_more=True o cliente chama novamente com o novo cursor.
+        
+        Entre as páginas, o cursor guarda a última chave (updated_at, id) lida
+        de cada tabela e a próxima página começa estritamente depois dela,
+        mesmo quando muitas linhas têm o mesmo updated_at (UPDATE em lote).
+        Ao fim da paginação, o cursor recua SYNC_CURSOR_OVERLAP_SECONDS para
+        não perder linhas gravadas com updated_at anterior ao commit de outra
+        transação, então algumas linhas podem se repetir: o cliente deve
+        aplicar upsert por id.
+        """
+        limit = limit or settings.sync_page_size
+        now = datetime.utcnow()
+        since: Optional[datetime] = None
+        keys: Dict[str, List[str]] = {}
+        reset = True
+        if cursor:
+            position, issued_at, keys = decode_sync_cursor(cursor)
+            if issued_at >= now - timedelta(days=settings.sync_tombstone_retention_days):
+                since, reset = position, False
+            else:
+                keys = {}
+        
+        # Continuações de uma sincronização completa também têm cursor; só a
+        # primeira página substitui a cópia local do cliente
+        reset = reset and not keys
+        overlap_position = now - timedelta(seconds=settings.sync_cursor_overlap_seconds)
+        has_more = False
+        changes: Dict[str, Any] = {"profile": None, "deleted": {table: [] for table, _ in SYNC_TABLES}}
+        
+        query = self.db.table("financial_profiles").select("*").eq("user_id", user_id)
+        if since is not None:
+            query = query.gte("updated_at", _to_db_timestamp(since))
+        profile_result = query.execute()
+        if profile_result.data:
+            changes["profile"] = FinancialProfile.model_construct(**self._cache_profile(profile_result.data[0]))
+        
+        for table, model in SYNC_TABLES:
+            query = self.db.table(table).select("*").eq("user_id", user_id)
+            if table in keys:
+                query = after_key(query, "updated_at", *keys[table])
+            elif since is not None:
+                # gte em vez de gt: linhas com o updated_at do cursor não se perdem
+                query = query.gte("updated_at", _to_db_timestamp(since))
+            rows = query.order("updated_at").order("id").limit(limit).execute().data or []
+            if len(rows) == limit:
+                has_more = True
+            if rows:
+                keys[table] = [rows[-1]["updated_at"], rows[-1]["id"]]
+            changes[table] = [model.model_construct(**row) for row in rows]
+        
+        if since is not None:
+            query = (
+                self.db.table("deleted_records")
+                .select("id, table_name, record_id, deleted_at")
+                .eq("user_id", user_id)
+            )
+            if "deleted_records" in keys:
+                query = after_key(query, "deleted_at", *keys["deleted_records"])
+            else:
+                query = query.gte("deleted_at", _to_db_timestamp(since))
+            tombstones = query.order("deleted_at").order("id").limit(limit).execute().data or []
+            if len(tombstones) == limit:
+                has_more = True
+            if tombstones:
+                keys["deleted_records"] = [tombstones[-1]["deleted_at"], tombstones[-1]["id"]]
+            for tombstone in tombstones:
+                changes["deleted"].setdefault(tombstone["table_name"], []).append(tombstone["record_id"])
+        
+        if has_more:
+            # Mesma posição e chaves por tabela: a próxima página continua de onde esta parou
+            position = since if since is not None else overlap_position
+            next_cursor = encode_sync_cursor(position, now, keys)
+        else:
+            next_position = overlap_position if since is None else max(overlap_position, since)
+            next_cursor = encode_sync_cursor(next_position, now)
+        
+        changes.update({
+            "cursor": next_cursor,
+            "has_more": has_more,
+            "reset": reset,
+        })
+        return changes
+    
+    def _record_deletion(self, table: str, user_id: str, record_id: str) -> None:
+        """Registra a exclusão de uma linha para a sincronização incremental"""
+        try:
+            self.db.table("deleted_records").insert({
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "table_name": table,
+                "record_id": record_id,
+                "deleted_at": datetime.utcnow().isoformat(),
+            }).execute()
+        except Exception as e:
+            # A linha já foi excluída; o cliente só a descarta em uma sincronização completa
+            logger.error("Erro ao registrar exclusão de %s/%s: %s", table, record_id, e)
+    
+    # Version Methods
+    async def get_data_version(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Versão dos dados do usuário: maior updated_at e contagem por tabela.
+
+        Usada nas ETags das leituras; uma única chamada à função
+        user_data_version (índices em user_id, updated_at) substitui a busca e
+        a serialização das linhas quando o cliente já tem a versão atual.
+        """
+        if self.identity_map is not None:
+            return await self.identity_map.memo(("data_version", user_id), lambda: self._load_data_version(user_id))
+        return await self._load_data_version(user_id)
+    
+    async def _load_data_version(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        if time.monotonic() >= FinancialService._version_rpc_retry_at:
+            try:
+                result = self.db.rpc("user_data_version", {"p_user_id": user_id}).execute()
+                return result.data or {}
+            except APIError as e:
+                if e.code != _FUNCTION_NOT_FOUND:
+                    raise
+                FinancialService._version_rpc_retry_at = time.monotonic() + _VERSION_RPC_REPROBE_SECONDS
+                logger.warning(
+                    "Função user_data_version indisponível; versões calculadas por tabela "
+                    "pelos próximos %.0fs", _VERSION_RPC_REPROBE_SECONDS
+                )
+        
+        version = {}
+        for table in VERSIONED_TABLES:
+            result = (
+                self.db.table(table)
+                .select("updated_at", count="exact")
+                .eq("user_id", user_id)
+                .order("updated_at", desc=True)
+                .limit(1)
+                .execute()
+            )
+            version[table] = {
+                "updated_at": result.data[0]["updated_at"] if result.data else None,
+                "count": result.count or 0,
+            }
+        return version
+    
     async def get_financial_summary(self, user_id: str) -> Dict[str, Any]:
         """Retorna resumo financeiro do usuário"""
         try:
@@ -266,12 +591,12 @@ class FinancialService:
             if not profile:
                 return {}
             
-            # Busca despesas dos últimos 30 dias
+            # Busca despesas dos últimos 30 dias (apenas amount, atendido por index-only scan)
             thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            expenses_result = self.db.table("expenses").select("*").eq("user_id", user_id).gte("date", thirty_days_ago.isoformat()).execute()
+            expenses_result = self.db.table("expenses").select("amount").eq("user_id", user_id).gte("date", thirty_days_ago.isoformat()).execute()
             
             # Busca recibos dos últimos 30 dias
-            receipts_result = self.db.table("receipts").select("*").eq("user_id", user_id).gte("date", thirty_days_ago.isoformat()).execute()
+            receipts_result = self.db.table("receipts").select("amount").eq("user_id", user_id).gte("date", thirty_days_ago.isoformat()).execute()
             
             total_expenses = sum(expense["amount"] for expense in expenses_result.data)
             total_receipts = sum(receipt["amount"] for receipt in receipts_result.data)
@@ -285,6 +610,8 @@ class FinancialService:
                 "net_flow_30_days": total_receipts - total_expenses
             }
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao gerar resumo financeiro: {e}")
+            logger.error("Erro ao gerar resumo financeiro: %s", e)
             return {} 
\ No newline at end of file
@@ -1,7 +1,9 @@
 from typing import List, Optional, Dict, Any
 from supabase import Client
 from app.models.user import User, UserCreate, UserUpdate
-from app.auth.jwt import jwt_manager
+from app.auth.passwords import password_hasher
+from app.auth.jwt import active_user_cache
+from app.resilience import DatabaseUnavailableError
 from fastapi import HTTPException, status
 import logging
 from datetime import datetime
@@ -25,7 +27,7 @@ class UserService:
                 )
             
             # Gera hash da senha
-            hashed_password = jwt_manager.get_password_hash(user_data.password)
+            hashed_password = await password_hasher.hash(user_data.password)
             
             # Prepara dados do usuário
             user_dict = user_data.dict()
@@ -48,8 +50,10 @@ class UserService:
             created_user = result.data[0]
             return User(**created_user)
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao criar usuário: {e}")
+            logger.error("Erro ao criar usuário: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Erro interno do servidor"
@@ -65,8 +69,10 @@ class UserService:
             
             return User(**result.data[0])
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao buscar usuário por ID: {e}")
+            logger.error("Erro ao buscar usuário por ID: %s", e)
             return None
     
     async def get_user_by_email(self, email: str) -> Optional[User]:
@@ -79,8 +85,10 @@ class UserService:
             
             return User(**result.data[0])
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao buscar usuário por email: {e}")
+            logger.error("Erro ao buscar usuário por email: %s", e)
             return None
     
     async def update_user(self, user_id: str, user_data: UserUpdate) -> Optional[User]:
@@ -90,47 +98,60 @@ class UserService:
             update_data["updated_at"] = datetime.utcnow().isoformat()
             
             result = self.db.table("users").update(update_data).eq("id", user_id).execute()
+            active_user_cache.delete(user_id)
             
             if not result.data:
                 return None
             
             return User(**result.data[0])
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao atualizar usuário: {e}")
+            logger.error("Erro ao atualizar usuário: %s", e)
             return None
     
     async def delete_user(self, user_id: str) -> bool:
         """Deleta usuário (soft delete)"""
         try:
             result = self.db.table("users").update({"is_active": False, "updated_at": datetime.utcnow().isoformat()}).eq("id", user_id).execute()
+            # Rejeita os tokens ainda válidos do usuário a partir da próxima requisição
+            active_user_cache.set(user_id, False)
             return len(result.data) > 0
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao deletar usuário: {e}")
+            logger.error("Erro ao deletar usuário: %s", e)
             return False
     
     async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Autentica usuário com email e senha"""
         try:
-            user = await self.get_user_by_email(email)
-            if not user:
-                return None
-            
-            # Busca a senha hasheada
-            result = self.db.table("users").select("hashed_password").eq("id", user.id).execute()
+            # Uma única consulta traz os dados do usuário e a senha hasheada
+            result = self.db.table("users").select("*").eq("email", email).execute()
             if not result.data:
                 return None
             
-            hashed_password = result.data[0]["hashed_password"]
+            user_row = result.data[0]
             
-            if not jwt_manager.verify_password(password, hashed_password):
+            valid, new_hash = await password_hasher.verify_and_update(password, user_row["hashed_password"])
+            if not valid:
                 return None
             
-            return user
+            if new_hash:
+                # O custo do bcrypt configurado mudou: regrava o hash no login
+                try:
+                    self.db.table("users").update({"hashed_password": new_hash}).eq("id", user_row["id"]).execute()
+                except Exception as e:
+                    logger.warning("Erro ao atualizar hash da senha: %s", e)
+            
+            return User(**user_row)
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro na autenticação: {e}")
+            logger.error("Erro na autenticação: %s", e)
             return None
     
     async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[User]:
@@ -140,6 +161,8 @@ class UserService:
             
             return [User(**user) for user in result.data]
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Erro ao listar usuários: {e}")
+            logger.error("Erro ao listar usuários: %s", e)
             return [] 
\ No newline at end of file
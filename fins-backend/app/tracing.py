@@ -0,0 +1,150 @@
+from typing import Any, Callable, Optional, Sequence
+from contextlib import contextmanager
+from fastapi import Request
+from fastapi.routing import APIRoute
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from app.config import settings
+import functools
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("fins")
+
+
+class JSONFileSpanExporter(SpanExporter):
+    """Exporta cada span como uma linha JSON em um arquivo local"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = [span.to_json(indent=None) for span in spans]
+        with self._lock:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _build_exporter() -> Optional[SpanExporter]:
+    if settings.tracing_exporter == "console":
+        return ConsoleSpanExporter()
+    if settings.tracing_exporter == "jsonl":
+        return JSONFileSpanExporter(settings.tracing_file_path)
+    logger.error(f"Exportador de tracing desconhecido: {settings.tracing_exporter}")
+    return None
+
+
+def configure_tracing() -> None:
+    """Instala o TracerProvider com o exportador local configurado"""
+    if not settings.tracing_enabled:
+        return
+    exporter = _build_exporter()
+    if exporter is None:
+        return
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": "fins-backend", "service.version": settings.version}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio)),
+    )
+    # O envio em lote roda em uma thread própria, fora do caminho da requisição
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Tracing habilitado com exportador '{settings.tracing_exporter}'")
+
+
+def shutdown_tracing() -> None:
+    """Descarrega os spans pendentes ao encerrar o worker"""
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any):
+    """Abre um span filho do span atual com os atributos informados"""
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+def traced(name: str):
+    """Decorator que envolve um método assíncrono em um span"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_query(context: Any, proceed: Callable[[], Any]) -> Any:
+    """Interceptador de consultas que cria um span por execute()"""
+    with tracer.start_as_current_span(
+        f"db.{context.operation} {context.table}",
+        kind=SpanKind.CLIENT,
+        attributes={
+            "db.system": "postgresql",
+            "db.sql.table": context.table,
+            "db.operation": context.operation,
+            "db.instance": getattr(context, "client", "primary"),
+        },
+    ):
+        return proceed()
+
+
+class TracedRoute(APIRoute):
+    """Rota que envolve dependências, handler e serialização da resposta em um span"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        methods = ",".join(sorted(self.methods or []))
+        span_name = f"{methods} {self.path_format}"
+
+        async def traced_handler(request: Request):
+            with tracer.start_as_current_span(
+                span_name,
+                kind=SpanKind.SERVER,
+                attributes={"http.method": request.method, "http.route": self.path_format},
+            ) as span:
+                response = await handler(request)
+                span.set_attribute("http.status_code", response.status_code)
+                if response.status_code >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
+                return response
+
+        return traced_handler
+
+
+class TraceContextFilter(logging.Filter):
+    """Adiciona trace_id e span_id do span atual a cada registro de log"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = trace.get_current_span().get_span_context()
+        if context.is_valid:
+            record.trace_id = format(context.trace_id, "032x")
+            record.span_id = format(context.span_id, "016x")
+        else:
+            record.trace_id = "-"
+            record.span_id = "-"
+        return True
+
+
+def install_log_trace_context() -> None:
+    """Injeta o contexto de trace nos handlers do logger raiz"""
+    for handler in logging.getLogger().handlers:
+        if not any(isinstance(f, TraceContextFilter) for f in handler.filters):
+            handler.addFilter(TraceContextFilter())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escala das análises do AIService
+
+Gera extratos sintéticos de tamanhos crescentes (benchmarks.ledger), executa
+as etapas internas do AIService sobre o banco em memória (app.memory_database)
+e registra o tempo (mediana das repetições) e o pico de memória de cada uma.
+Com --baseline, compara com uma execução salva e falha se alguma medida
+piorar além do limite configurado.
+
+Uso:
+    python -m benchmarks.bench_ai_service --sizes 100 1000 10000 --save-baseline benchmarks/baselines/ai_service.json
+    python -m benchmarks.bench_ai_service --baseline benchmarks/baselines/ai_service.json --threshold 25
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from app.identity_map import IdentityMap
+from app.memory_database import MemoryClient
+from app.services.ai_service import AIService
+from benchmarks.ledger import LedgerConfig, generate_ledger
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Mede a mediana do tempo e o pico de memória alocada por uma chamada"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    # A memória é medida em uma execução separada, pois o tracemalloc
+    # deixa as alocações mais lentas e distorceria o tempo
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": statistics.median(timings), "peak_mb": peak / 1024 / 1024}
+
+
+def build_cases(source: MemoryClient, user_id: str, skip_prophet: bool) -> Dict[str, Callable[[], Any]]:
+    # Serviço sem mapa de identidade: cada chamada refaz as consultas e o DataFrame
+    cold = AIService(source)
+    # Serviço com o DataFrame memorizado, para medir só a análise
+    warm = AIService(source, IdentityMap(source))
+    df = asyncio.run(warm.get_user_financial_data(user_id))
+
+    cases = {
+        "get_user_financial_data": lambda: asyncio.run(cold.get_user_financial_data(user_id)),
+        "_calculate_risk_features": lambda: warm._calculate_risk_features(df),
+        "analyze_expenses": lambda: asyncio.run(warm.analyze_expenses(user_id)),
+    }
+    if not skip_prophet:
+        cases["predict_balance"] = lambda: asyncio.run(warm.predict_balance(user_id))
+    return cases
+
+
+def run(args) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'caso':<28}{'linhas':>10}{'tempo (ms)':>14}{'pico (MB)':>12}")
+    for size in args.sizes:
+        config = LedgerConfig.for_rows(size, months=args.months, seed=args.seed)
+        ledger = generate_ledger(config)
+        source = MemoryClient(latency_ms=args.latency_ms)
+        source.load(ledger.tables)
+        for name, func in build_cases(source, ledger.user_ids[0], args.skip_prophet).items():
+            stats = measure(func, args.repeat)
+            stats["rows"] = ledger.row_count
+            results[f"{name}@{size}"] = stats
+            print(f"{name:<28}{ledger.row_count:>10}{stats['seconds'] * 1000:>14.2f}{stats['peak_mb']:>12.1f}")
+        del ledger, source
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "months": args.months,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "latency_ms": args.latency_ms,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_seconds: float) -> List[str]:
+    """Retorna as medidas que pioraram mais que `threshold` por cento"""
+    regressions = []
+    for key, stats in current["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if not before:
+            continue
+        if before["seconds"] >= min_seconds:
+            delta = (stats["seconds"] - before["seconds"]) / before["seconds"] * 100
+            if delta > threshold:
+                regressions.append(f"{key}: tempo {before['seconds'] * 1000:.1f} → {stats['seconds'] * 1000:.1f} ms ({delta:+.0f}%)")
+        if before["peak_mb"] > 0:
+            delta = (stats["peak_mb"] - before["peak_mb"]) / before["peak_mb"] * 100
+            if delta > threshold:
+                regressions.append(f"{key}: memória {before['peak_mb']:.1f} → {stats['peak_mb']:.1f} MB ({delta:+.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escala do AIService")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Número de transações por execução")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência simulada por consulta")
+    parser.add_argument("--skip-prophet", action="store_true", help="Não executa predict_balance (ajuste do Prophet)")
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados")
+    parser.add_argument("--save-baseline", help="Salva os resultados como nova linha de base")
+    parser.add_argument("--baseline", help="Linha de base para comparação")
+    parser.add_argument("--threshold", type=float, default=25.0, help="Piora máxima aceitável (%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.005,
+                        help="Ignora regressões de tempo em medidas da linha de base abaixo deste valor")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = run(args)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Resultados salvos em {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"❌ {len(regressions)} medidas pioraram mais de {args.threshold:.0f}%:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"✅ Nenhuma regressão acima de {args.threshold:.0f}% em relação à linha de base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
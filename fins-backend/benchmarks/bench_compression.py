@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark da compressão das respostas de /financial e /ai
+
+Gera extratos sintéticos (benchmarks.ledger) de tamanhos crescentes, produz
+os corpos reais das respostas pelos serviços sobre o banco em memória e mede,
+para cada codificação disponível (gzip, br, zstd), os bytes enviados, a taxa
+de compressão e o tempo de CPU gasto. As exportações (CSV/NDJSON) são
+comprimidas trecho a trecho, com flush a cada trecho, como o
+CompressionMiddleware faz com respostas em streaming.
+
+Os níveis de compressão seguem as Settings (COMPRESSION_GZIP_LEVEL,
+COMPRESSION_BROTLI_QUALITY, COMPRESSION_ZSTD_LEVEL).
+
+Uso:
+    python -m benchmarks.bench_compression --sizes 100 1000 10000
+    COMPRESSION_BROTLI_QUALITY=6 python -m benchmarks.bench_compression --encodings br --output br6.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from app.identity_map import IdentityMap
+from app.memory_database import MemoryClient
+from app.middleware.compression import Compressor, available_codecs
+from app.responses import FastJSONResponse
+from app.services.ai_service import AIService
+from app.services.export_service import ExportFormat, ExportService
+from app.services.financial_service import FinancialService
+from benchmarks.ledger import LedgerConfig, generate_ledger
+
+DEFAULT_SIZES = [100, 1_000, 10_000]
+
+
+def build_payloads(source: MemoryClient, user_id: str, size: int, skip_prophet: bool) -> Dict[str, List[bytes]]:
+    """Corpos das respostas por rota; cada corpo é uma lista de trechos"""
+    identity_map = IdentityMap(source)
+    financial = FinancialService(source, identity_map)
+    ai = AIService(source, identity_map)
+    exports = ExportService(source)
+
+    def body(coro) -> List[bytes]:
+        return [FastJSONResponse(asyncio.run(coro)).body]
+
+    payloads = {
+        "GET /financial/expenses": body(financial.get_user_expenses(user_id, 0, size)),
+        "GET /financial/receipts": body(financial.get_user_receipts(user_id, 0, size)),
+        "GET /financial/summary": body(financial.get_financial_summary(user_id)),
+        "GET /ai/analyze/expenses": body(ai.analyze_expenses(user_id)),
+        "GET /ai/analyze/risk": body(ai.analyze_risk(user_id)),
+    }
+    if not skip_prophet:
+        payloads["GET /ai/insights"] = body(ai.generate_financial_insights(user_id))
+    for export_format in (ExportFormat.CSV, ExportFormat.NDJSON):
+        chunks = [chunk for chunk in exports.stream(user_id, export_format) if chunk]
+        payloads[f"GET /financial/export?format={export_format.value}"] = chunks
+    return payloads
+
+
+def compress_chunks(factory: Callable[[], Compressor], chunks: List[bytes]) -> bytes:
+    """Comprime como o middleware: de uma vez ou com flush a cada trecho"""
+    compressor = factory()
+    out = [compressor.compress(chunk, flush=True) for chunk in chunks[:-1]]
+    out.append(compressor.compress(chunks[-1]) + compressor.finish())
+    return b"".join(out)
+
+
+def measure(factory: Callable[[], Compressor], chunks: List[bytes], repeat: int) -> Dict[str, float]:
+    """Mede o tempo de CPU (mediana) e o tamanho comprimido"""
+    timings = []
+    compressed = b""
+    for _ in range(repeat):
+        start = time.thread_time()
+        compressed = compress_chunks(factory, chunks)
+        timings.append(time.thread_time() - start)
+    raw = sum(len(chunk) for chunk in chunks)
+    cpu = statistics.median(timings)
+    return {
+        "raw_bytes": raw,
+        "bytes": len(compressed),
+        "ratio": raw / len(compressed) if compressed else 0.0,
+        "cpu_ms": cpu * 1000,
+        "mb_per_s": raw / 1024 / 1024 / cpu if cpu else 0.0,
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    codecs = available_codecs()
+    encodings = [e for e in args.encodings if e in codecs] if args.encodings else list(codecs)
+    missing = set(args.encodings or []) - set(codecs)
+    if missing:
+        print(f"⚠️  Codificações indisponíveis neste ambiente: {', '.join(sorted(missing))}")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'rota':<40}{'linhas':>8}{'cod.':>6}{'bruto (KB)':>12}{'enviado (KB)':>14}{'taxa':>7}{'CPU (ms)':>10}{'MB/s':>8}")
+    for size in args.sizes:
+        ledger = generate_ledger(LedgerConfig.for_rows(size, months=args.months, seed=args.seed))
+        source = MemoryClient()
+        source.load(ledger.tables)
+        payloads = build_payloads(source, ledger.user_ids[0], size, args.skip_prophet)
+        for route, chunks in payloads.items():
+            for encoding in encodings:
+                stats = measure(codecs[encoding], chunks, args.repeat)
+                stats["chunks"] = len(chunks)
+                results[f"{route}@{size}[{encoding}]"] = stats
+                print(
+                    f"{route:<40}{ledger.row_count:>8}{encoding:>6}{stats['raw_bytes'] / 1024:>12.1f}"
+                    f"{stats['bytes'] / 1024:>14.1f}{stats['ratio']:>7.1f}{stats['cpu_ms']:>10.2f}{stats['mb_per_s']:>8.0f}"
+                )
+        del ledger, source
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "months": args.months,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "encodings": encodings,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da compressão das respostas")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Número de transações por execução")
+    parser.add_argument("--encodings", nargs="+", help="Codificações a medir (padrão: todas as disponíveis)")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-prophet", action="store_true", help="Não gera o corpo de /ai/insights (ajuste do Prophet)")
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = run(args)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Resultados salvos em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do custo por linha na serialização das listagens
+
+Compara o caminho antigo (modelo validado por linha, revalidação contra o
+response_model e encoder JSON padrão, como o FastAPI faz) com o caminho
+rápido (model_construct + FastJSONResponse com orjson).
+
+Uso:
+    python -m benchmarks.bench_serialization --rows 100 1000 10000
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from pydantic import TypeAdapter
+
+from app.models.user import Expense
+from app.responses import FastJSONResponse
+
+CATEGORIES = ["alimentacao", "transporte", "saude", "aluguel", "diversas"]
+
+
+def make_rows(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Gera linhas no formato retornado pelo PostgREST"""
+    rng = random.Random(seed)
+    user_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    start = datetime(2024, 1, 1)
+    rows = []
+    for _ in range(count):
+        date = start + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": user_id,
+            "amount": round(rng.uniform(5, 500), 2),
+            "category": rng.choice(CATEGORIES),
+            "description": f"Despesa {rng.randint(1, 10_000)}",
+            "date": date.isoformat() + "+00:00",
+            "created_at": date.isoformat() + "+00:00",
+            "updated_at": date.isoformat() + "+00:00",
+        })
+    return rows
+
+
+def legacy_path(rows: List[Dict[str, Any]], adapter: TypeAdapter) -> bytes:
+    """Caminho antigo: validação por linha + revalidação do response_model + json"""
+    models = [Expense(**row) for row in rows]
+    # O FastAPI converte os modelos em dict e os valida novamente
+    dumped = [model.model_dump() for model in models]
+    validated = adapter.validate_python(dumped)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows: List[Dict[str, Any]]) -> bytes:
+    """Caminho rápido: model_construct + orjson"""
+    models = [Expense.model_construct(**row) for row in rows]
+    return FastJSONResponse(models).body
+
+
+def measure(func: Callable[[], bytes], repeat: int) -> float:
+    """Retorna o melhor tempo de execução em segundos"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialização das listagens")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[Expense])
+
+    print(f"{'linhas':>8} {'antigo (µs/linha)':>18} {'rápido (µs/linha)':>18} {'ganho':>7}")
+    for count in args.rows:
+        rows = make_rows(count)
+        legacy = measure(lambda: legacy_path(rows, adapter), args.repeat)
+        fast = measure(lambda: fast_path(rows), args.repeat)
+        print(
+            f"{count:>8} {legacy / count * 1e6:>18.2f} {fast / count * 1e6:>18.2f} "
+            f"{legacy / fast if fast else 0:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Gerador determinístico de extratos financeiros sintéticos
+
+Produz linhas no mesmo formato retornado pelo PostgREST para as tabelas
+users, financial_profiles, expenses e receipts, com número configurável de
+usuários, meses, transações por mês, mix de categorias, sazonalidade e
+valores atípicos. A mesma configuração (incluindo a semente e a data final)
+sempre gera os mesmos dados.
+"""
+
+import math
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Peso relativo de cada categoria e valor típico de uma despesa
+DEFAULT_CATEGORY_MIX = {
+    "alimentacao": 0.40,
+    "transporte": 0.25,
+    "saude": 0.10,
+    "aluguel": 0.05,
+    "diversas": 0.20,
+}
+CATEGORY_BASE_AMOUNT = {
+    "alimentacao": 45.0,
+    "transporte": 25.0,
+    "saude": 120.0,
+    "aluguel": 1500.0,
+    "diversas": 80.0,
+}
+
+
+@dataclass
+class LedgerConfig:
+    users: int = 1
+    months: int = 12
+    transactions_per_month: int = 60
+    category_mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_CATEGORY_MIX))
+    receipt_ratio: float = 0.1  # Fração das transações que são recebimentos
+    seasonality: float = 0.2  # Amplitude da variação anual dos gastos (0 = sem sazonalidade)
+    outlier_rate: float = 0.01
+    outlier_multiplier: float = 10.0
+    seed: int = 42
+    end_date: Optional[date] = None  # Padrão: hoje, para que os dados caiam na janela das análises
+
+    @classmethod
+    def for_rows(cls, rows: int, users: int = 1, months: int = 12, **kwargs) -> "LedgerConfig":
+        """Configuração que gera aproximadamente `rows` transações no total"""
+        per_month = max(1, math.ceil(rows / (users * months)))
+        return cls(users=users, months=months, transactions_per_month=per_month, **kwargs)
+
+    @property
+    def total_rows(self) -> int:
+        return self.users * self.months * self.transactions_per_month
+
+
+@dataclass
+class Ledger:
+    config: LedgerConfig
+    user_ids: List[str]
+    tables: Dict[str, List[Dict[str, Any]]]
+
+    @property
+    def row_count(self) -> int:
+        return len(self.tables["expenses"]) + len(self.tables["receipts"])
+
+
+def _uuid(namespace: int, index: int) -> str:
+    return str(uuid.UUID(int=(namespace << 96) | index))
+
+
+def generate_ledger(config: LedgerConfig) -> Ledger:
+    """Gera os dados de todos os usuários da configuração"""
+    rng = np.random.default_rng(config.seed)
+    end = datetime.combine(config.end_date or date.today(), time(12, 0))
+    days = config.months * 30
+    categories = list(config.category_mix)
+    weights = np.array([config.category_mix[c] for c in categories], dtype=float)
+    weights /= weights.sum()
+    base_amounts = np.array([CATEGORY_BASE_AMOUNT.get(c, 80.0) for c in categories])
+
+    tables: Dict[str, List[Dict[str, Any]]] = {"users": [], "financial_profiles": [], "expenses": [], "receipts": []}
+    user_ids = []
+    per_user = config.months * config.transactions_per_month
+
+    for u in range(config.users):
+        user_id = _uuid(1, u)
+        user_ids.append(user_id)
+        created_at = (end - timedelta(days=days)).isoformat() + "+00:00"
+        salary = float(np.round(rng.uniform(2000, 15000), 2))
+        tables["users"].append({
+            "id": user_id,
+            "email": f"usuario{u}@example.com",
+            "full_name": f"Usuário Sintético {u}",
+            "hashed_password": "",
+            "is_active": True,
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+        tables["financial_profiles"].append({
+            "id": _uuid(2, u),
+            "user_id": user_id,
+            "salary": salary,
+            "current_balance": float(np.round(rng.uniform(0, 50000), 2)),
+            "monthly_expenses": {c: round(CATEGORY_BASE_AMOUNT.get(c, 80.0) * 10, 2) for c in categories},
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+
+        offsets = rng.uniform(0, days, per_user)
+        is_receipt = rng.random(per_user) < config.receipt_ratio
+        category_idx = rng.choice(len(categories), size=per_user, p=weights)
+        amounts = base_amounts[category_idx] * rng.lognormal(0.0, 0.5, per_user)
+        # Sazonalidade anual com pico em meados de dezembro
+        day_of_year = (end.timetuple().tm_yday - offsets) % 365
+        amounts *= 1 + config.seasonality * np.cos(2 * np.pi * (day_of_year - 350) / 365)
+        outliers = rng.random(per_user) < config.outlier_rate
+        amounts[outliers] *= config.outlier_multiplier
+        receipt_amounts = salary * rng.uniform(0.2, 1.0, per_user)
+        amounts = np.round(np.where(is_receipt, receipt_amounts, amounts), 2)
+
+        for i in range(per_user):
+            timestamp = (end - timedelta(days=float(offsets[i]))).isoformat() + "+00:00"
+            category = categories[category_idx[i]]
+            if is_receipt[i]:
+                tables["receipts"].append({
+                    "id": _uuid(4, u * per_user + i),
+                    "user_id": user_id,
+                    "amount": float(amounts[i]),
+                    "category": "salario",
+                    "description": "Recebimento",
+                    "date": timestamp,
+                    "created_at": timestamp,
+                    "updated_at": timestamp,
+                })
+            else:
+                tables["expenses"].append({
+                    "id": _uuid(3, u * per_user + i),
+                    "user_id": user_id,
+                    "amount": float(amounts[i]),
+                    "category": category,
+                    "description": f"Despesa de {category}",
+                    "date": timestamp,
+                    "created_at": timestamp,
+                    "updated_at": timestamp,
+                })
+
+    return Ledger(config=config, user_ids=user_ids, tables=tables)
@@ -0,0 +1,47 @@
+"""Índices compostos para as consultas por usuário e data
+
+Todas as consultas quentes filtram por user_id e depois ordenam ou fazem
+range em date. Os índices (user_id, date DESC) atendem listagens, resumo,
+coleta de dados da IA e exportação; (user_id, category, date) atende as
+análises por categoria. O INCLUDE (amount) permite index-only scans nas
+somas do resumo. Os índices simples em user_id viram prefixos redundantes
+dos compostos e são removidos para reduzir o custo de escrita.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE/DROP INDEX CONCURRENTLY não pode rodar dentro de transação
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_expenses_user_date "
+            "ON expenses (user_id, date DESC) INCLUDE (amount)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_receipts_user_date "
+            "ON receipts (user_id, date DESC) INCLUDE (amount)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_expenses_user_category_date "
+            "ON expenses (user_id, category, date) INCLUDE (amount)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_expenses_user_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_receipts_user_id")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_expenses_user_id ON expenses (user_id)")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_receipts_user_id ON receipts (user_id)")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_expenses_user_category_date")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_receipts_user_date")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_expenses_user_date")
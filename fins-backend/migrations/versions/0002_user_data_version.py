@@ -0,0 +1,64 @@
+"""Índices (user_id, updated_at) e função de versão dos dados do usuário
+
+As ETags de /financial/profile, /expenses, /receipts e /summary são
+derivadas do maior updated_at e da contagem de linhas de cada tabela do
+usuário. A função user_data_version calcula essa versão em uma única
+chamada RPC, e os índices (user_id, updated_at) permitem responder com
+index-only scans, sem ler as linhas.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE/DROP INDEX CONCURRENTLY não pode rodar dentro de transação
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_expenses_user_updated_at "
+            "ON expenses (user_id, updated_at DESC)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_receipts_user_updated_at "
+            "ON receipts (user_id, updated_at DESC)"
+        )
+    # financial_profiles já tem UNIQUE(user_id): no máximo uma linha por usuário
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION user_data_version(p_user_id UUID)
+        RETURNS JSONB AS $$
+            SELECT jsonb_build_object(
+                'financial_profiles', (
+                    SELECT jsonb_build_object('updated_at', MAX(updated_at), 'count', COUNT(*))
+                    FROM financial_profiles WHERE user_id = p_user_id
+                ),
+                'expenses', (
+                    SELECT jsonb_build_object('updated_at', MAX(updated_at), 'count', COUNT(*))
+                    FROM expenses WHERE user_id = p_user_id
+                ),
+                'receipts', (
+                    SELECT jsonb_build_object('updated_at', MAX(updated_at), 'count', COUNT(*))
+                    FROM receipts WHERE user_id = p_user_id
+                )
+            );
+        $$ LANGUAGE sql STABLE
+        """
+    )
+    op.execute(
+        "COMMENT ON FUNCTION user_data_version IS "
+        "'Versão dos dados do usuário (maior updated_at e contagem por tabela), usada nas ETags'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS user_data_version(UUID)")
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_receipts_user_updated_at")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_expenses_user_updated_at")
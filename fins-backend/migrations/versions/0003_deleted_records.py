@@ -0,0 +1,46 @@
+"""Registros de exclusão para a sincronização incremental
+
+delete_expense apaga a linha definitivamente, então /financial/sync não
+teria como informar a exclusão ao cliente. O serviço grava um registro em
+deleted_records para cada exclusão; o índice (user_id, deleted_at) atende a
+leitura por faixa a partir do cursor. Os registros mais antigos que
+SYNC_TOMBSTONE_RETENTION_DAYS podem ser removidos periodicamente.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS deleted_records (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+            table_name VARCHAR(50) NOT NULL,
+            record_id UUID NOT NULL,
+            deleted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_deleted_records_user_deleted_at "
+        "ON deleted_records (user_id, deleted_at)"
+    )
+    op.execute("ALTER TABLE deleted_records ENABLE ROW LEVEL SECURITY")
+    op.execute(
+        'CREATE POLICY "Users can view own deleted records" ON deleted_records '
+        "FOR SELECT USING (auth.uid()::text = user_id::text)"
+    )
+    op.execute("COMMENT ON TABLE deleted_records IS 'Exclusões de despesas e recibos, para a sincronização incremental'")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS deleted_records")
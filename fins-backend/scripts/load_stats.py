@@ -0,0 +1,16 @@
+"""
+Estatísticas compartilhadas pelos testes de carga (load_test e login_load_test)
+"""
+
+from typing import List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por interpolação linear"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Teste de carga da API FINS
+
+Simula sessões realistas de usuários, derivadas do fluxo de run_tests.py:
+registro, login, criação e leitura do perfil, N despesas, resumo financeiro
+e insights de IA. As sessões chegam com taxa configurável (processo de
+Poisson) ou em malha fechada, limitadas por um número máximo de sessões
+simultâneas. Ao final são exibidos vazão e p50/p95/p99 por endpoint, e os
+resultados podem ser exportados em JSON e comparados com uma execução
+anterior.
+
+Com o rate limiting habilitado, várias sessões vindas do mesmo IP esgotam o
+bucket de registro/login; para medir a aplicação, rode o servidor com
+RATE_LIMIT_ENABLED=false.
+
+Uso:
+    python scripts/load_test.py http://localhost:8000 --sessions 200 --concurrency 20 --arrival-rate 5
+    python scripts/load_test.py --sessions 200 --output depois.json --compare antes.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# Adicionar o diretório raiz ao path para importar os módulos de scripts/
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.load_stats import percentile
+
+CATEGORIES = ["alimentacao", "transporte", "saude", "aluguel", "diversas"]
+
+
+class LoadTestRecorder:
+    """Acumula latências e status por endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.sessions_completed = 0
+        self.sessions_failed = 0
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str,
+                      expected: int = 200, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.latencies[endpoint].append(time.perf_counter() - start)
+            self.statuses[endpoint][type(e).__name__] += 1
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        self.statuses[endpoint][str(response.status_code)] += 1
+        if response.status_code != expected:
+            self.errors[endpoint] += 1
+            return None
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            endpoints[endpoint] = {
+                "count": len(values),
+                "errors": self.errors[endpoint],
+                "statuses": dict(self.statuses[endpoint]),
+                "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "mean_ms": statistics.mean(values) * 1000,
+                "max_ms": max(values) * 1000,
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {
+            "elapsed_seconds": elapsed,
+            "sessions_completed": self.sessions_completed,
+            "sessions_failed": self.sessions_failed,
+            "requests": total,
+            "throughput_rps": total / elapsed if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+async def run_session(client: httpx.AsyncClient, recorder: LoadTestRecorder, args, session_id: int):
+    """Executa uma sessão completa de um usuário novo"""
+    rng = random.Random(args.seed + session_id)
+    email = f"load_{args.run_id}_{session_id}@example.com"
+    password = "loadtest-password-123"
+
+    response = await recorder.request(client, "POST /auth/register", "POST", "/api/v1/auth/register", expected=201, json={
+        "email": email,
+        "full_name": f"Sessão de Carga {session_id}",
+        "password": password,
+    })
+    if response is None:
+        recorder.sessions_failed += 1
+        return
+
+    response = await recorder.request(client, "POST /auth/login", "POST", "/api/v1/auth/login",
+                                      data={"username": email, "password": password})
+    if response is None:
+        recorder.sessions_failed += 1
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    await recorder.request(client, "POST /financial/profile", "POST", "/api/v1/financial/profile", expected=201, headers=headers, json={
+        "salary": round(rng.uniform(2000, 15000), 2),
+        "current_balance": round(rng.uniform(0, 50000), 2),
+        "monthly_expenses": {category: round(rng.uniform(100, 1500), 2) for category in CATEGORIES},
+    })
+    await recorder.request(client, "GET /financial/profile", "GET", "/api/v1/financial/profile", headers=headers)
+
+    now = datetime.utcnow()
+    for _ in range(args.expenses):
+        await recorder.request(client, "POST /financial/expenses", "POST", "/api/v1/financial/expenses", expected=201, headers=headers, json={
+            "amount": round(rng.uniform(5, 500), 2),
+            "category": rng.choice(CATEGORIES),
+            "description": "Despesa do teste de carga",
+            "date": (now - timedelta(days=rng.randint(0, 365))).isoformat() + "Z",
+        })
+
+    await recorder.request(client, "GET /financial/summary", "GET", "/api/v1/financial/summary", headers=headers)
+    if not args.skip_insights:
+        await recorder.request(client, "GET /ai/insights", "GET", "/api/v1/ai/insights", headers=headers)
+    recorder.sessions_completed += 1
+
+
+async def main_async(args) -> Dict[str, Any]:
+    recorder = LoadTestRecorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+
+    async def limited(session_id: int):
+        async with semaphore:
+            await run_session(client, recorder, args, session_id)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        tasks = []
+        for session_id in range(args.sessions):
+            tasks.append(asyncio.create_task(limited(session_id)))
+            if args.arrival_rate > 0:
+                # Chegadas de Poisson: intervalos exponenciais com média 1/taxa
+                await asyncio.sleep(rng.expovariate(args.arrival_rate))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    result = recorder.summary(elapsed)
+    result["config"] = {
+        "base_url": args.base_url,
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "arrival_rate": args.arrival_rate,
+        "expenses": args.expenses,
+        "skip_insights": args.skip_insights,
+        "seed": args.seed,
+        "started_at": datetime.utcnow().isoformat(),
+    }
+    return result
+
+
+def print_report(result: Dict[str, Any]):
+    print("\n" + "=" * 96)
+    print(f"{'endpoint':<28}{'reqs':>7}{'erros':>7}{'req/s':>9}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}{'máx (ms)':>11}")
+    for endpoint, stats in result["endpoints"].items():
+        print(
+            f"{endpoint:<28}{stats['count']:>7}{stats['errors']:>7}{stats['throughput_rps']:>9.1f}"
+            f"{stats['p50_ms']:>11.1f}{stats['p95_ms']:>11.1f}{stats['p99_ms']:>11.1f}{stats['max_ms']:>11.1f}"
+        )
+    print("=" * 96)
+    print(
+        f"Sessões: {result['sessions_completed']} concluídas, {result['sessions_failed']} falharam | "
+        f"{result['requests']} requisições em {result['elapsed_seconds']:.1f}s ({result['throughput_rps']:.1f} req/s)"
+    )
+    for endpoint, stats in result["endpoints"].items():
+        unexpected = {status: count for status, count in stats["statuses"].items() if not status.startswith("2")}
+        if unexpected:
+            print(f"⚠️  {endpoint}: {unexpected}")
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> bool:
+    """Compara os percentis com uma execução anterior; retorna False se houver regressão"""
+    print(f"\n📊 Comparação com a execução anterior (limite de regressão do p95: {max_regression:.0f}%)")
+    print(f"{'endpoint':<28}{'p50':>16}{'p95':>16}{'p99':>16}")
+    ok = True
+    for endpoint, stats in result["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before:
+            print(f"{endpoint:<28}{'(novo)':>16}")
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            delta = (stats[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            cells.append(f"{stats[key]:.0f} ({delta:+.0f}%)")
+            if key == "p95_ms" and delta > max_regression:
+                ok = False
+        print(f"{endpoint:<28}" + "".join(f"{cell:>16}" for cell in cells))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API FINS")
+    parser.add_argument("base_url", nargs="?", default="http://localhost:8000")
+    parser.add_argument("--sessions", type=int, default=50, help="Total de sessões de usuário")
+    parser.add_argument("--concurrency", type=int, default=10, help="Máximo de sessões simultâneas")
+    parser.add_argument("--arrival-rate", type=float, default=0.0,
+                        help="Sessões iniciadas por segundo (0 = todas de uma vez, limitadas pela concorrência)")
+    parser.add_argument("--expenses", type=int, default=10, help="Despesas criadas por sessão")
+    parser.add_argument("--skip-insights", action="store_true", help="Não chama /ai/insights")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados")
+    parser.add_argument("--compare", help="Resultados JSON de uma execução anterior")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="Aumento máximo aceitável do p95 (%%)")
+    args = parser.parse_args()
+    args.run_id = int(time.time())
+
+    print(f"🔗 {args.sessions} sessões contra {args.base_url} (concorrência {args.concurrency}, "
+          f"chegada {args.arrival_rate or 'imediata'}/s, {args.expenses} despesas por sessão)")
+    result = asyncio.run(main_async(args))
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultados salvos em {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(result, baseline, args.max_regression):
+            print("❌ p95 regrediu além do limite")
+            return 1
+        print("✅ Nenhuma regressão de p95 além do limite")
+    return 0 if result["sessions_failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    exit(main())
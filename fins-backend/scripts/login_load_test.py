@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Teste de carga de login da API FINS
+
+Mede a latência de um endpoint não relacionado (por padrão /health)
+primeiro em repouso e depois durante uma rajada de logins concorrentes.
+Com o bcrypt fora do event loop, o p99 do endpoint sondado deve
+permanecer praticamente igual nas duas fases.
+
+Uso:
+    python scripts/login_load_test.py http://localhost:8000 --concurrency 50 --duration 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+# Adicionar o diretório raiz ao path para importar os módulos de scripts/
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.load_stats import percentile
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+async def probe(client: httpx.AsyncClient, path: str, interval: float, stop: asyncio.Event) -> List[float]:
+    """Sonda o endpoint em intervalo fixo enquanto a fase estiver ativa"""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(path)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login_worker(client: httpx.AsyncClient, credentials: Dict[str, str], stop: asyncio.Event, results: List[float]):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.post("/api/v1/auth/login", data=credentials)
+        results.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            print(f"⚠️  Login retornou {response.status_code}: {response.text[:100]}")
+
+
+async def run_phase(client: httpx.AsyncClient, args, credentials: Dict[str, str], with_logins: bool):
+    stop = asyncio.Event()
+    login_latencies: List[float] = []
+    probe_task = asyncio.create_task(probe(client, args.probe_path, args.probe_interval, stop))
+    workers = []
+    if with_logins:
+        workers = [
+            asyncio.create_task(login_worker(client, credentials, stop, login_latencies))
+            for _ in range(args.concurrency)
+        ]
+    await asyncio.sleep(args.duration)
+    stop.set()
+    probe_latencies = await probe_task
+    await asyncio.gather(*workers)
+    return summarize(probe_latencies), summarize(login_latencies)
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        credentials = {"username": f"loadtest_{int(time.time())}@example.com", "password": "loadtest-password-123"}
+        response = await client.post("/api/v1/auth/register", json={
+            "email": credentials["username"],
+            "full_name": "Teste de Carga",
+            "password": credentials["password"],
+        })
+        if response.status_code != 201:
+            print(f"❌ Falha ao registrar usuário de teste: {response.status_code} {response.text}")
+            return 1
+
+        print(f"📏 Fase 1: {args.probe_path} em repouso ({args.duration}s)")
+        idle, _ = await run_phase(client, args, credentials, with_logins=False)
+        print(f"🔥 Fase 2: {args.probe_path} durante {args.concurrency} logins concorrentes ({args.duration}s)")
+        burst, logins = await run_phase(client, args, credentials, with_logins=True)
+
+    print("\n" + "=" * 60)
+    print(f"{'':<22}{'p50 (ms)':>12}{'p95 (ms)':>12}{'p99 (ms)':>12}")
+    for name, stats in (("sonda em repouso", idle), ("sonda com logins", burst), ("login", logins)):
+        print(f"{name:<22}{stats['p50_ms']:>12.1f}{stats['p95_ms']:>12.1f}{stats['p99_ms']:>12.1f}")
+    print(f"\nLogins concluídos: {logins['count']} ({logins['count'] / args.duration:.1f}/s)")
+
+    if idle["p99_ms"] and burst["p99_ms"] > idle["p99_ms"] * args.max_p99_ratio:
+        print(f"❌ p99 da sonda aumentou mais de {args.max_p99_ratio}x durante os logins")
+        return 1
+    print("✅ p99 da sonda não foi afetado pelos logins")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga de login")
+    parser.add_argument("base_url", nargs="?", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50, help="Logins simultâneos")
+    parser.add_argument("--duration", type=float, default=20.0, help="Duração de cada fase em segundos")
+    parser.add_argument("--probe-path", default="/health")
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--max-p99-ratio", type=float, default=3.0, help="Aumento máximo aceitável do p99 da sonda")
+    args = parser.parse_args()
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,10 @@
+-- Migração de monthly_expenses para JSONB nativo
+-- Versões anteriores da API gravavam o campo como uma string JSON dentro da
+-- coluna JSONB ("{\"aluguel\": 1500}"). Este script converte essas linhas
+-- para objetos JSONB, permitindo consultas e índices sobre o campo.
+
+UPDATE financial_profiles
+SET monthly_expenses = (monthly_expenses #>> '{}')::jsonb
+WHERE jsonb_typeof(monthly_expenses) = 'string';
+
+SELECT 'monthly_expenses migrated to native JSONB' as status;
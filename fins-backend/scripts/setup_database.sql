@@ -62,6 +62,11 @@ CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses(category);
 CREATE INDEX IF NOT EXISTS idx_receipts_user_id ON receipts(user_id);
 CREATE INDEX IF NOT EXISTS idx_receipts_date ON receipts(date);
 
+-- Os índices compostos (user_id, date DESC), (user_id, category, date) e
+-- (user_id, updated_at), além da função user_data_version usada nas ETags, são
+-- gerenciados pelo Alembic. Após executar este script, rode:
+--   alembic upgrade head
+
 -- Função para atualizar o timestamp updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$